@@ -7,6 +7,11 @@ public class SensorData
     public float toxic_gas;
     public float co2;
     public float oxygen;
+
+    public SensorData Copy()
+    {
+        return (SensorData)MemberwiseClone();
+    }
 }
 
 [Serializable]
@@ -17,4 +22,16 @@ public class ServerData
     public string alert_message;
     public string action_plan;
     public float prediction_water;
+    public float prediction_food;    // kcal/day
+    public float prediction_oxygen;  // L/day
+
+    /// <summary>
+    /// Independent copy (sensor included) that a new packet can be merged into
+    /// </summary>
+    public ServerData Copy()
+    {
+        ServerData copy = (ServerData)MemberwiseClone();
+        if (sensor != null) copy.sensor = sensor.Copy();
+        return copy;
+    }
 }
\ No newline at end of file
@@ -11,8 +11,9 @@ public class PythonConnector : MonoBehaviour
     private Thread receiveThread;
     private bool isRunning = false;
 
-    // Store latest data for other scripts to read
-    public ServerData latestData;
+    // Latest state for other scripts to read. Published as a whole new object and never
+    // modified afterwards, so read the reference once per frame to get one consistent packet
+    public volatile ServerData latestData;
 
     void Start()
     {
@@ -63,28 +64,48 @@ public class PythonConnector : MonoBehaviour
 
     void ReceiveData()
     {
+        byte[] buffer = new byte[4096];
+        char[] chars = new char[Encoding.UTF8.GetMaxCharCount(buffer.Length)];
+        // Stateful decoder + pending text: a packet (or a UTF-8 character) may span several reads
+        Decoder utf8 = Encoding.UTF8.GetDecoder();
+        StringBuilder pending = new StringBuilder();
+
         while (isRunning)
         {
             try
             {
-                byte[] buffer = new byte[4096];
                 if (stream.CanRead)
                 {
                     int bytesRead = stream.Read(buffer, 0, buffer.Length);
-                    if (bytesRead > 0)
+                    if (bytesRead == 0)
+                    {
+                        Debug.LogWarning("Data stream closed by Python backend");
+                        isRunning = false;
+                        break;
+                    }
+
+                    int charCount = utf8.GetChars(buffer, 0, bytesRead, chars, 0);
+                    pending.Append(chars, 0, charCount);
+
+                    // Only parse complete lines; keep the unfinished tail for the next read
+                    string text = pending.ToString();
+                    int start = 0;
+                    int newline;
+                    while ((newline = text.IndexOf('\n', start)) >= 0)
                     {
-                        string jsonStr = Encoding.UTF8.GetString(buffer, 0, bytesRead);
-                        // Simple processing: split by newline, take the last valid data
-                        string[] lines = jsonStr.Split('\n');
-                        foreach (var line in lines)
+                        string line = text.Substring(start, newline - start);
+                        start = newline + 1;
+                        if (!string.IsNullOrEmpty(line))
                         {
-                            if (!string.IsNullOrEmpty(line))
-                            {
-                                // Parse JSON
-                                latestData = JsonUtility.FromJson<ServerData>(line);
-                            }
+                            // Merge into a copy so delta packets (changed fields only) keep the rest of the
+                            // last state, then publish it with one reference store: the main thread never
+                            // sees half of one packet and half of the previous one
+                            ServerData next = latestData == null ? new ServerData() : latestData.Copy();
+                            JsonUtility.FromJsonOverwrite(line, next);
+                            latestData = next;
                         }
                     }
+                    pending.Remove(0, start);
                 }
             }
             catch (Exception e)
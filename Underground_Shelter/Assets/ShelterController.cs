@@ -42,10 +42,13 @@ public class ShelterController : MonoBehaviour
 
     void Update()
     {
+        // One read of the published packet per frame, so every field below comes from the same packet
+        ServerData data = connector != null ? connector.latestData : null;
+
         // 0. Sync mode from Python backend (for terminal commands)
-        if (connector != null && connector.latestData != null && !string.IsNullOrEmpty(connector.latestData.mode))
+        if (data != null && !string.IsNullOrEmpty(data.mode))
         {
-            string pythonMode = connector.latestData.mode;
+            string pythonMode = data.mode;
             if (pythonMode != currentMode)
             {
                 currentMode = pythonMode;
@@ -72,7 +75,7 @@ public class ShelterController : MonoBehaviour
         }
 
         // 3. Update dashboard display
-        UpdateDashboard();
+        UpdateDashboard(data);
 
         // 4. Alarm light effects
         if (currentMode != "n")
@@ -135,7 +138,7 @@ public class ShelterController : MonoBehaviour
         if (connector != null) connector.SendCommand("n");
     }
 
-    void UpdateDashboard()
+    void UpdateDashboard(ServerData data)
     {
         if (dashboardText == null) return;
 
@@ -144,11 +147,11 @@ public class ShelterController : MonoBehaviour
         string pythonAlert = "SYSTEM NORMAL";
         string pythonAction = "MONITORING";
 
-        if (connector != null && connector.latestData != null)
+        if (data != null)
         {
-            waterUsage = connector.latestData.prediction_water;
-            pythonAlert = connector.latestData.alert_message;
-            pythonAction = connector.latestData.action_plan;
+            waterUsage = data.prediction_water;
+            pythonAlert = data.alert_message;
+            pythonAction = data.action_plan;
         }
 
         string status = pythonAlert;
@@ -0,0 +1,313 @@
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import numpy as np
+from detect import AirQualityMonitor
+from react import EmergencyDecisionTree
+from predict import ResourcePredictor, RESOURCE_TARGETS
+from protocol import StringTable, encode_status
+from server import build_status_report, encode_json, forecaster, predictor as server_predictor
+
+BENCHMARK_OUTPUT_DIR = os.path.join(os.path.dirname(__file__), 'benchmark_output')
+SERVER_SCRIPT = os.path.join(os.path.dirname(__file__), 'server.py')
+
+# Each command changes the mode, so every one of them must show up in a later packet
+COMMAND_CYCLE = ('r', 'g', 'o', 'n')
+# A benchmark this much slower (p50) than the baseline is flagged as a regression,
+# unless the difference is below timer noise
+REGRESSION_RATIO = 1.2
+REGRESSION_MIN_US = 1.0
+# train_model and train_out_of_core must agree on the same data (R², CV folds, predictions)
+PARITY_TOLERANCE = 1e-9
+# Packages that an inference-only server must not import
+HEAVY_MODULES = ('sklearn', 'matplotlib', 'pandas', 'scipy', 'joblib')
+
+def percentiles(samples_us):
+    samples_us = np.asarray(samples_us, dtype=float)
+    p50, p95, p99 = np.percentile(samples_us, (50, 95, 99))
+    return {"mean_us": float(samples_us.mean()), "p50_us": float(p50), "p95_us": float(p95),
+            "p99_us": float(p99), "min_us": float(samples_us.min()), "max_us": float(samples_us.max())}
+
+def measure(fn, repeat=50, number=100):
+    """Per-call time of fn() over `repeat` timed batches of `number` calls (after one warm-up batch)"""
+    for _ in range(number):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter_ns() - start) / number / 1000)
+    result = percentiles(samples)
+    result["calls"] = repeat * number
+    result["ops_per_sec"] = 1e6 / result["p50_us"]
+    return result
+
+def micro_benchmarks(train_repeat=3):
+    """Hot-path components in isolation: prediction, training, decisions, detection and encoding"""
+    predictor = ResourcePredictor()
+    predictor.load_or_train(num_people=50, verbose=False)
+    server_predictor.load_or_train(num_people=50, verbose=False)  # Used by build_status_report
+    monitor = AirQualityMonitor()
+    decision_system = EmergencyDecisionTree()
+    X, y_water, y_food, y_oxygen = predictor.generate_training_data(50, verbose=False)
+    Y = np.column_stack([y_water, y_food, y_oxygen])
+    trainer = ResourcePredictor()
+    status_report, _ = build_status_report('r')
+    table = StringTable()
+    reading = {"radiation": 500, "toxic_gas": 0, "co2": 400, "oxygen": 21}
+
+    cases = [
+        ("predict_single", lambda: predictor.predict(100, 50, 2, future_days=1), {}),
+        ("predict_horizon_30", lambda: predictor.predict(100, 50, 2, future_days=30), {}),
+        ("predict_resources_30", lambda: predictor.predict_resources(100, 50, 2, future_days=30), {}),
+        ("train_model", lambda: trainer.train_model(X, Y, verbose=False, save_plots=False,
+                                                    target_names=RESOURCE_TARGETS),
+         {"repeat": train_repeat, "number": 1}),
+        ("make_decision", lambda: decision_system.make_decision("radiation_high", "high"), {}),
+        ("check_air_quality", lambda: monitor.check_air_quality(reading), {}),
+        ("build_status_report", lambda: build_status_report('r'), {}),
+        ("encode_status_json", lambda: encode_json(status_report), {}),
+        ("encode_status_binary", lambda: encode_status(status_report, table), {}),
+    ]
+
+    results = {}
+    print(f"   {'Benchmark':<24}{'p50 µs':>12}{'p95 µs':>12}{'ops/s':>14}")
+    for name, fn, options in cases:
+        results[name] = measure(fn, **options)
+        r = results[name]
+        print(f"   {name:<24}{r['p50_us']:>12.2f}{r['p95_us']:>12.2f}{r['ops_per_sec']:>14,.0f}")
+    results["train_model"]["rows"] = len(X)
+    results["forecast_cache"] = forecaster.stats()
+    return results
+
+def training_parity(num_people=(30, 50, 80), days=2000, output_dir=BENCHMARK_OUTPUT_DIR):
+    """Fit the same data in memory and out of core; both paths must give the same model"""
+    in_memory = ResourcePredictor()
+    X, y_water, y_food, y_oxygen = in_memory.generate_training_data(list(num_people), days, verbose=False)
+    Y = np.column_stack([y_water, y_food, y_oxygen])
+    in_memory.train_model(X, Y, verbose=False, save_plots=False, target_names=RESOURCE_TARGETS)
+    streamed = ResourcePredictor()
+    X_path, Y_path = streamed.write_training_data(os.path.join(output_dir, 'parity_data'), list(num_people), days)
+    streamed.train_out_of_core(X_path, Y_path, target_names=RESOURCE_TARGETS, verbose=False, save_report=False)
+
+    expected = in_memory.evaluator.evaluate(X)
+    result = {
+        "rows": len(X),
+        "r2_diff": max(abs(in_memory.training_history['target_metrics'][name]['r2_score']
+                           - streamed.training_history['target_metrics'][name]['r2_score'])
+                       for name in RESOURCE_TARGETS),
+        "cv_diff": float(np.abs(in_memory.training_history['cv_scores']
+                                - streamed.training_history['cv_scores']).max()),
+        "prediction_diff": float(np.abs(expected - streamed.evaluator.evaluate(X)).max() / np.abs(expected).max()),
+    }
+    result["ok"] = max(result["r2_diff"], result["cv_diff"], result["prediction_diff"]) <= PARITY_TOLERANCE
+    print(f"   train_model vs train_out_of_core ({result['rows']} rows): R² Δ {result['r2_diff']:.1e} | "
+          f"CV Δ {result['cv_diff']:.1e} | prediction Δ {result['prediction_diff']:.1e} "
+          f"{'✓' if result['ok'] else '⚠️ mismatch'}")
+    return result
+
+class FakeUnityClient:
+    """Scripted stand-in for PythonConnector.cs: sends commands and reads JSON status lines"""
+    def __init__(self, host, port, timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stream = self.sock.makefile('rb')
+        self.packets = 0
+        self.bytes = 0
+
+    def send(self, command):
+        self.sock.sendall((command + "\n").encode('utf-8'))
+
+    def read_packet(self):
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection")
+        self.packets += 1
+        self.bytes += len(line)
+        return json.loads(line)
+
+    def wait_for_mode(self, mode):
+        while self.read_packet().get("mode") != mode:
+            pass
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+def wait_for_port(host, port, process, timeout):
+    """Block until the server accepts connections (it may have to train a model first)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before accepting connections")
+        try:
+            socket.create_connection((host, port), timeout=1.0).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Server did not open {host}:{port} within {timeout:g} s")
+
+def end_to_end(port=65510, tick_rate=10.0, commands=200, duration=5.0, startup_timeout=300.0):
+    """Full pipeline via start_server in a child process: command-to-update latency and packet rate"""
+    host = '127.0.0.1'
+    process = subprocess.Popen(
+        [sys.executable, SERVER_SCRIPT, '--port', str(port), '--tick-rate', str(tick_rate), '--metrics-only'],
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        wait_for_port(host, port, process, startup_timeout)
+        client = FakeUnityClient(host, port)
+        client.read_packet()  # Initial snapshot
+
+        # --- A. Command-to-update latency: send, then read until a packet reflects the command ---
+        latencies = []
+        for i in range(commands):
+            command = COMMAND_CYCLE[i % len(COMMAND_CYCLE)]
+            start = time.perf_counter_ns()
+            client.send(command)
+            client.wait_for_mode(command)
+            latencies.append((time.perf_counter_ns() - start) / 1000)
+
+        # --- B. Steady-state stream rate with no commands ---
+        client.packets = client.bytes = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            client.read_packet()
+        elapsed = time.perf_counter() - start
+        client.close()
+
+        result = {"command_latency": percentiles(latencies), "commands": commands, "tick_rate": tick_rate,
+                  "packets_per_sec": client.packets / elapsed, "bytes_per_sec": client.bytes / elapsed}
+        lat = result["command_latency"]
+        print(f"   Command -> update latency: p50 {lat['p50_us'] / 1000:.2f} ms | p95 {lat['p95_us'] / 1000:.2f} ms | "
+              f"p99 {lat['p99_us'] / 1000:.2f} ms ({commands} commands)")
+        print(f"   Stream: {result['packets_per_sec']:.1f} packets/s at --tick-rate {tick_rate:g} "
+              f"({result['bytes_per_sec']:,.0f} B/s)")
+        return result
+    finally:
+        try:
+            process.communicate(b"q\n", timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from `python -X importtime` output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2  # One leading space, then two per nesting level
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def import_profile(module='server', top=8):
+    """Cold `import <module>` cost (-X importtime) and the heavy packages an inference-only start loads"""
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    # --- A. Import time: fresh interpreter, nothing cached in sys.modules ---
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             capture_output=True, text=True, cwd=cwd)
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{process.stderr[-2000:]}")
+    rows = parse_importtime(process.stderr)
+    roots = sorted((row for row in rows if row[3] == 1), key=lambda row: row[2], reverse=True)
+    total_us = sum(row[2] for row in roots)
+    loaded = sorted({name.split('.')[0] for name, *_ in rows} & set(HEAVY_MODULES))
+    print(f"   import {module}: {total_us / 1000:.1f} ms cumulative ({len(rows)} modules)")
+    for name, _, cumulative_us, _ in roots[:top]:
+        print(f"      {name:<28}{cumulative_us / 1000:>9.1f} ms")
+    print(f"   Heavy packages at import: {', '.join(loaded) or 'none'}")
+
+    # --- B. Inference-only startup: which heavy packages does serving from the artifact pull in? ---
+    probe = ("import json, sys, server; server.prepare_model(inference_only=True); "
+             f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    process = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, cwd=cwd)
+    inference_loaded = None
+    if process.returncode == 0 and 'failed' not in process.stdout:
+        inference_loaded = json.loads(process.stdout.strip().splitlines()[-1])
+        print(f"   Heavy packages after inference-only startup: {', '.join(inference_loaded) or 'none'}")
+    else:
+        print("   ⚠️ Inference-only startup skipped: no saved model artifact (run server.py once to train)")
+
+    return {"module": module, "total_us": total_us, "modules": len(rows),
+            "top": [{"module": name, "cumulative_us": cumulative_us} for name, _, cumulative_us, _ in roots[:top]],
+            "heavy_at_import": loaded, "heavy_after_inference_startup": inference_loaded}
+
+def machine_info():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor(), "cpu_count": os.cpu_count(), "numpy": np.__version__}
+
+def compare(results, baseline_path):
+    """Print p50 ratios against an earlier results file, flagging regressions"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    rows = [(name, r["p50_us"], baseline["micro"][name]["p50_us"])
+            for name, r in results["micro"].items() if "p50_us" in r and name in baseline.get("micro", {})]
+    if results.get("end_to_end") and baseline.get("end_to_end"):
+        rows.append(("command_latency", results["end_to_end"]["command_latency"]["p50_us"],
+                     baseline["end_to_end"]["command_latency"]["p50_us"]))
+    if results.get("imports") and baseline.get("imports"):
+        rows.append(("import_" + results["imports"]["module"], results["imports"]["total_us"],
+                     baseline["imports"]["total_us"]))
+
+    print(f"\n   Compared with {baseline_path} ({baseline['timestamp']}):")
+    print(f"   {'Benchmark':<24}{'baseline µs':>14}{'now µs':>12}{'ratio':>9}")
+    regressions = 0
+    for name, now, before in rows:
+        ratio = now / before
+        flag = " ⚠️ regression" if ratio > REGRESSION_RATIO and now - before > REGRESSION_MIN_US else ""
+        regressions += bool(flag)
+        print(f"   {name:<24}{before:>14.2f}{now:>12.2f}{ratio:>8.2f}x{flag}")
+    return regressions
+
+def run(output_dir=BENCHMARK_OUTPUT_DIR, baseline=None, server=True, imports_only=False, **e2e_options):
+    print("="*60)
+    print("⏱️ BENCHMARK SUITE")
+    print("="*60)
+    results = {"timestamp": time.strftime('%Y-%m-%d %H:%M:%S'), "machine": machine_info()}
+    print("\n   [1/3] Imports (-X importtime)")
+    results["imports"] = import_profile()
+    results["micro"] = {}
+    results["end_to_end"] = None
+    if not imports_only:
+        print("\n   [2/3] Components")
+        results["micro"] = micro_benchmarks()
+        results["parity"] = training_parity(output_dir=output_dir)
+        if server:
+            print("\n   [3/3] End-to-end (fake Unity client -> server.py)")
+            results["end_to_end"] = end_to_end(**e2e_options)
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n   💾 Results saved to {path}")
+
+    if baseline:
+        results["regressions"] = compare(results, baseline)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the shelter backend components and full server pipeline")
+    parser.add_argument('--output-dir', default=BENCHMARK_OUTPUT_DIR, help="Where to write the results JSON")
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against")
+    parser.add_argument('--no-server', action='store_true', help="Skip the end-to-end server benchmark")
+    parser.add_argument('--imports-only', action='store_true', help="Only measure import time and inference-only imports")
+    parser.add_argument('--port', type=int, default=65510, help="Port for the benchmark server")
+    parser.add_argument('--tick-rate', type=float, default=10.0, help="Server --tick-rate during the run")
+    parser.add_argument('--commands', type=int, default=200, help="Commands sent for the latency measurement")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds of steady-state streaming to measure")
+    args = parser.parse_args()
+
+    results = run(args.output_dir, args.baseline, server=not args.no_server, imports_only=args.imports_only,
+                  port=args.port, tick_rate=args.tick_rate, commands=args.commands, duration=args.duration)
+    parity_failed = results.get("parity") and not results["parity"]["ok"]
+    sys.exit(1 if results.get("regressions") or parity_failed else 0)
@@ -1,17 +1,153 @@
 import time
 import random
+from collections import deque
+import numpy as np
+
+# Column order for batched (N x 4) sensor readings
+SENSOR_CHANNELS = ("radiation", "toxic_gas", "co2", "oxygen")
+
+# Alert bits returned by check_air_quality_batch
+ALERT_RADIATION = 1
+ALERT_TOXIC_GAS = 2
+ALERT_CO2 = 4
+ALERT_LOW_OXYGEN = 8
+
+ALERT_MESSAGES = (
+    (ALERT_RADIATION, "⚠️ High radiation alert! Activating lead shielding"),
+    (ALERT_TOXIC_GAS, "⚠️ Toxic gas detected! Switching to internal circulation mode"),
+    (ALERT_CO2, "⚠️ CO2 level too high! Activating carbon filter"),
+    (ALERT_LOW_OXYGEN, "⚠️ Oxygen level low! Activating electrolysis oxygen generator")
+)
+
+class RollingWindow:
+    """Mean/variance (sliding Welford) and min/max (monotonic queues) over the last `size` samples"""
+    def __init__(self, size, num_channels):
+        self.size = size
+        self.n = 0
+        self.mean = np.zeros(num_channels)
+        self.m2 = np.zeros(num_channels)
+        self.min_queues = [deque() for _ in range(num_channels)]
+        self.max_queues = [deque() for _ in range(num_channels)]
+    
+    def update(self, x, seq, leaving=None):
+        """Add sample number `seq`; `leaving` is the sample that drops out of the window, if any"""
+        if leaving is not None:
+            self.n -= 1
+            if self.n == 0:
+                # Window of one: the window is empty again, so start from scratch
+                self.mean[:] = 0.0
+                self.m2[:] = 0.0
+            else:
+                delta = leaving - self.mean
+                self.mean -= delta / self.n
+                self.m2 -= delta * (leaving - self.mean)
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        
+        expired = seq - self.size
+        for c, value in enumerate(x.tolist()):
+            min_q, max_q = self.min_queues[c], self.max_queues[c]
+            while min_q and min_q[-1][1] >= value:
+                min_q.pop()
+            min_q.append((seq, value))
+            if min_q[0][0] <= expired:
+                min_q.popleft()
+            while max_q and max_q[-1][1] <= value:
+                max_q.pop()
+            max_q.append((seq, value))
+            if max_q[0][0] <= expired:
+                max_q.popleft()
+    
+    def stats(self):
+        return {
+            "samples": self.n,
+            "mean": self.mean.copy(),
+            "var": np.maximum(self.m2, 0.0) / max(self.n, 1),
+            "min": np.array([q[0][1] for q in self.min_queues]),
+            "max": np.array([q[0][1] for q in self.max_queues])
+        }
+
+class SensorHistory:
+    """Fixed-capacity ring buffer of readings, alert masks and timestamps with rolling statistics.
+    
+    Every sample is written twice (slot i and i + capacity), so the last n <= capacity samples are
+    always one contiguous slice and window() can hand out views instead of copies.
+    """
+    def __init__(self, capacity=3600, windows=(10, 60, 600), channels=SENSOR_CHANNELS):
+        if any(w < 1 or w > capacity for w in windows):
+            raise ValueError(f"Windows must be between 1 and capacity ({capacity}), got {windows}")
+        self.capacity = capacity
+        self.channels = tuple(channels)
+        self.values = np.zeros((2 * capacity, len(self.channels)))
+        self.masks = np.zeros(2 * capacity, dtype=np.uint8)
+        self.times = np.zeros(2 * capacity)
+        self.head = 0   # Next slot to write
+        self.count = 0  # Samples appended since start
+        self.windows = {w: RollingWindow(w, len(self.channels)) for w in windows}
+        
+        # Start time of the current uninterrupted run of each alert bit (NaN while clear)
+        self.alert_bits = np.array([bit for bit, _ in ALERT_MESSAGES], dtype=np.uint8)
+        self.run_start = np.full(len(self.alert_bits), np.nan)
+    
+    def __len__(self):
+        return min(self.count, self.capacity)
+    
+    def append(self, reading, timestamp, mask=0):
+        """O(1): store one reading and update every rolling window"""
+        x = np.asarray(reading, dtype=float)
+        for size, window in self.windows.items():
+            leaving = self.values[(self.head - size) % self.capacity].copy() if self.count >= size else None
+            window.update(x, self.count, leaving)
+        
+        for slot in (self.head, self.head + self.capacity):
+            self.values[slot] = x
+            self.masks[slot] = mask
+            self.times[slot] = timestamp
+        
+        active = (self.alert_bits & mask) != 0
+        self.run_start[~active] = np.nan
+        self.run_start[active & np.isnan(self.run_start)] = timestamp
+        
+        self.head = (self.head + 1) % self.capacity
+        self.count += 1
+    
+    def window(self, n=None):
+        """Views (values, masks, times) of the last n samples, oldest first - no copy"""
+        n = len(self) if n is None else min(n, len(self))
+        end = self.head + self.capacity
+        return self.values[end - n:end], self.masks[end - n:end], self.times[end - n:end]
+    
+    def stats(self, size):
+        """Rolling mean/var/min/max per channel over one of the configured windows"""
+        if self.count == 0:
+            raise ValueError("No samples recorded yet")
+        return self.windows[size].stats()
+    
+    def sustained(self, seconds, now=None):
+        """Bitmask of alerts that have been set in every sample for at least `seconds`"""
+        if self.count == 0:
+            return 0
+        now = self.times[self.head + self.capacity - 1] if now is None else now
+        held = ~np.isnan(self.run_start) & (now - np.nan_to_num(self.run_start, nan=now) >= seconds)
+        return int(np.bitwise_or.reduce(self.alert_bits[held], initial=0))
 
 class AirQualityMonitor:
-    def __init__(self):
+    def __init__(self, history_capacity=3600, history_windows=(10, 60, 600)):
         # Sensor thresholds
         self.RADIATION_THRESHOLD = 100  # uSv/h
         self.TOXIC_GAS_THRESHOLD = 50   # ppm
         self.CO2_THRESHOLD = 5000       # ppm
+        self.OXYGEN_THRESHOLD = 19.5    # % (alert when below)
         
         # System status
         self.air_mode = "normal"  # normal / internal_circulation / emergency
         self.filter_status = "active"
         
+        # Constant-memory reading history
+        self.history = SensorHistory(history_capacity, history_windows)
+    
     def simulate_sensor_data(self):
         """Simulate sensor data"""
         return {
@@ -21,24 +157,49 @@ class AirQualityMonitor:
             "oxygen": random.uniform(18, 23)
         }
     
+    def simulate_sensor_data_batch(self, n, rng=None):
+        """Simulate n readings at once as an (n x 4) array in SENSOR_CHANNELS order"""
+        rng = np.random.default_rng() if rng is None else rng
+        low = np.array([10, 10, 3000, 18], dtype=float)
+        high = np.array([150, 80, 7000, 23], dtype=float)
+        return rng.uniform(low, high, size=(n, len(SENSOR_CHANNELS)))
+    
+    def check_air_quality_batch(self, readings):
+        """Evaluate an (n x 4) array of readings; returns a uint8 alert bitmask per row"""
+        readings = np.asarray(readings, dtype=float).reshape(-1, len(SENSOR_CHANNELS))
+        mask = np.zeros(len(readings), dtype=np.uint8)
+        mask |= (readings[:, 0] > self.RADIATION_THRESHOLD) * np.uint8(ALERT_RADIATION)
+        mask |= (readings[:, 1] > self.TOXIC_GAS_THRESHOLD) * np.uint8(ALERT_TOXIC_GAS)
+        mask |= (readings[:, 2] > self.CO2_THRESHOLD) * np.uint8(ALERT_CO2)
+        mask |= (readings[:, 3] < self.OXYGEN_THRESHOLD) * np.uint8(ALERT_LOW_OXYGEN)
+        return mask
+    
+    @staticmethod
+    def alert_messages(mask):
+        """Alert text for one bitmask"""
+        return [message for bit, message in ALERT_MESSAGES if mask & bit]
+    
+    def flagged_alerts(self, masks):
+        """Alert text built only for flagged rows: {row index: [alerts]}"""
+        masks = np.asarray(masks)
+        return {int(row): self.alert_messages(int(masks[row])) for row in np.flatnonzero(masks)}
+    
     def check_air_quality(self, sensor_data):
         """Check air quality and trigger corresponding responses"""
-        alerts = []
-        
-        # Check radiation
-        if sensor_data["radiation"] > self.RADIATION_THRESHOLD:
-            alerts.append("⚠️ High radiation alert! Activating lead shielding")
-            
-        # Check toxic gas
-        if sensor_data["toxic_gas"] > self.TOXIC_GAS_THRESHOLD:
-            alerts.append("⚠️ Toxic gas detected! Switching to internal circulation mode")
-            
-        # Check CO2 concentration
-        if sensor_data["co2"] > self.CO2_THRESHOLD:
-            alerts.append("⚠️ CO2 level too high! Activating carbon filter")
-            
-        # Check oxygen concentration
-        if sensor_data["oxygen"] < 19.5:
-            alerts.append("⚠️ Oxygen level low! Activating electrolysis oxygen generator")
-            
-        return alerts
\ No newline at end of file
+        reading = [sensor_data[channel] for channel in SENSOR_CHANNELS]
+        return self.alert_messages(int(self.check_air_quality_batch(reading)[0]))
+    
+    def record(self, sensor_data, timestamp=None):
+        """Check one reading and append it to the history; returns its alert bitmask"""
+        reading = [sensor_data[channel] for channel in SENSOR_CHANNELS]
+        mask = int(self.check_air_quality_batch(reading)[0])
+        self.history.append(reading, time.monotonic() if timestamp is None else timestamp, mask)
+        return mask
+    
+    def sustained_alerts(self, seconds, now=None):
+        """Alert bits continuously active for at least `seconds`, e.g. radiation above threshold for 10 s"""
+        return self.history.sustained(seconds, now)
+    
+    def rolling_stats(self, window):
+        """Rolling per-channel statistics over the last `window` recorded samples"""
+        return self.history.stats(window)
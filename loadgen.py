@@ -0,0 +1,373 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from detect import SENSOR_CHANNELS
+from protocol import PROTOCOL_JSON, PROTOCOL_BINARY, HANDSHAKE_PREFIX, BinaryDecoder
+
+LOADGEN_OUTPUT_DIR = os.path.join(os.path.dirname(__file__), 'benchmark_output')
+
+COMMANDS = ('n', 'r', 'g', 'o')
+# Only the probe client ever asks for PROBE_COMMAND, so the first packet showing that mode after
+# a probe is sent answers that probe and not an identical command from another client
+PROBE_COMMAND = 'o'
+LOAD_COMMANDS = tuple(c for c in COMMANDS if c != PROBE_COMMAND)
+# Backstop for a probe that neither shows up nor is visibly replaced; normally a replaced probe
+# is detected from the stream and resent right away (see VirtualClient.on_packet)
+PROBE_TIMEOUT_S = 5.0
+# Top-level fields of a status packet and their JSON types
+STATUS_FIELDS = {
+    "mode": str,
+    "sensor": dict,
+    "alert_message": str,
+    "action_plan": str,
+    "prediction_water": (int, float),
+    "prediction_food": (int, float),
+    "prediction_oxygen": (int, float)
+}
+# Command -> update latency histogram bucket upper bounds (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+# Invalid packets kept verbatim in the report
+MAX_PROBLEM_SAMPLES = 10
+
+def validate_packet(packet, partial=False):
+    """Problems found in one decoded status packet ([] if valid); partial accepts delta packets"""
+    if not isinstance(packet, dict):
+        return [f"packet is a {type(packet).__name__}, not an object"]
+    problems = [f"unknown field '{field}'" for field in packet if field not in STATUS_FIELDS]
+    for field, kind in STATUS_FIELDS.items():
+        if field not in packet:
+            if not partial:
+                problems.append(f"missing '{field}'")
+        elif not isinstance(packet[field], kind) or isinstance(packet[field], bool):
+            problems.append(f"'{field}' is a {type(packet[field]).__name__}")
+    if "mode" in packet and packet["mode"] not in COMMANDS:
+        problems.append(f"unknown mode {packet['mode']!r}")
+    sensor = packet.get("sensor")
+    if isinstance(sensor, dict):
+        for channel in SENSOR_CHANNELS:
+            if not isinstance(sensor.get(channel), (int, float)):
+                problems.append(f"sensor.{channel} missing or not a number")
+    return problems
+
+class LoadStats:
+    """Counters and raw latency samples for one shard of clients (mergeable across processes)"""
+    COUNTERS = ("connected", "connect_failures", "disconnects", "packets", "bytes", "invalid", "torn",
+                "commands_sent", "probes_sent", "probes_confirmed", "probes_lost", "probes_unconfirmed")
+
+    def __init__(self):
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.latencies_us = []
+        self.client_rates = []  # Packets/s received by each client that stayed connected
+        self.problems = []
+
+    def problem(self, text):
+        if len(self.problems) < MAX_PROBLEM_SAMPLES:
+            self.problems.append(text)
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.COUNTERS}
+        data.update(latencies_us=self.latencies_us, client_rates=self.client_rates, problems=self.problems)
+        return data
+
+    @classmethod
+    def merge(cls, shards):
+        stats = cls()
+        for shard in shards:
+            for name in cls.COUNTERS:
+                setattr(stats, name, getattr(stats, name) + shard[name])
+            stats.latencies_us.extend(shard["latencies_us"])
+            stats.client_rates.extend(shard["client_rates"])
+            stats.problems.extend(shard["problems"][:MAX_PROBLEM_SAMPLES - len(stats.problems)])
+        return stats
+
+class VirtualClient:
+    """One simulated viewer: reads and validates the stream, and sends commands at a fixed rate
+
+    Load clients send untimed n/r/g commands. The probe client (one per run) is the only
+    one that measures latency: it sends PROBE_COMMAND, which no other client uses, and
+    waits for the first packet showing it before sending the next probe. If another
+    client's command replaces the probe first, the probe is resent at once; its latency
+    runs from the first attempt until the mode is on screen, so retries are included.
+    """
+    def __init__(self, stats, options, rng, probe=False):
+        self.stats = stats
+        self.options = options
+        self.rng = rng
+        self.probe = probe
+        self.mode = None
+        self.pending = None  # Send time in ns of the first attempt of the unconfirmed probe
+        self.probe_mode = None  # Mode on screen when the probe was last sent
+        self.writer = None
+        self.packets = 0
+
+    def on_packet(self, packet, now):
+        problems = validate_packet(packet, partial=self.options["partial"])
+        if problems:
+            self.stats.invalid += 1
+            self.stats.problem(f"{'; '.join(problems)}: {json.dumps(packet, default=str)[:200]}")
+            return
+        self.packets += 1
+        self.stats.packets += 1
+        self.mode = packet.get("mode", self.mode)
+        if not self.pending:
+            return
+        if self.mode == PROBE_COMMAND:
+            self.stats.latencies_us.append((now - self.pending) / 1000)
+            self.stats.probes_confirmed += 1
+            self.pending = None
+        elif self.mode != self.probe_mode:
+            # Another client's command landed after the probe went out: it replaced the probe
+            self.stats.probes_lost += 1
+            self.send_probe()
+
+    def send_probe(self):
+        self.probe_mode = self.mode
+        self.writer.write((PROBE_COMMAND + "\n").encode("utf-8"))
+        self.stats.probes_sent += 1
+        self.stats.commands_sent += 1
+
+    async def read_json(self, reader):
+        while True:
+            line = await reader.readline()
+            now = time.perf_counter_ns()
+            if not line:
+                return
+            self.stats.bytes += len(line)
+            if not line.endswith(b"\n"):
+                self.stats.torn += 1  # Connection ended mid-line
+                return
+            try:
+                packet = json.loads(line)
+            except ValueError:
+                self.stats.torn += 1
+                self.stats.problem(f"unparseable line: {line[:200]!r}")
+                continue
+            self.on_packet(packet, now)
+
+    async def read_binary(self, reader):
+        decoder = BinaryDecoder()
+        while True:
+            data = await reader.read(65536)
+            now = time.perf_counter_ns()
+            if not data:
+                if decoder.buffer:
+                    self.stats.torn += 1  # Connection ended mid-frame
+                return
+            self.stats.bytes += len(data)
+            try:
+                reports = decoder.feed(data)
+            except ValueError as e:
+                self.stats.torn += 1
+                self.stats.problem(f"bad frame: {e}")
+                return  # Framing is lost; nothing after this can be trusted
+            for report in reports:
+                self.on_packet(report, now)
+
+    def next_command(self):
+        """Command to send this tick, or None; the probe client sends its probes itself"""
+        if not self.probe:
+            # Always ask for a different mode than the one on screen, so the load is real work
+            return self.rng.choice([c for c in LOAD_COMMANDS if c != self.mode])
+        now = time.perf_counter_ns()
+        if self.pending:
+            if now - self.pending < PROBE_TIMEOUT_S * 1e9:
+                return None  # One probe in flight at a time
+            self.stats.probes_lost += 1
+            self.pending = None
+        if self.mode == PROBE_COMMAND:
+            return LOAD_COMMANDS[0]  # Untimed reset, so the next probe is an observable change
+        self.pending = now
+        self.send_probe()
+        return None
+
+    async def send_commands(self, writer, stop_at):
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.options["probe_rate" if self.probe else "rate"]
+        await asyncio.sleep(self.rng.uniform(0, interval))  # Spread clients across the interval
+        next_send = loop.time()
+        while next_send < stop_at:
+            command = self.next_command()
+            if command:
+                writer.write((command + "\n").encode("utf-8"))
+                self.stats.commands_sent += 1
+            await writer.drain()
+            next_send += interval
+            await asyncio.sleep(max(next_send - loop.time(), 0))
+
+    async def run(self, start_at, stop_at):
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(max(start_at - loop.time(), 0))
+        options = self.options
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(options["host"], options["port"]), options["connect_timeout"])
+        except (OSError, asyncio.TimeoutError) as e:
+            self.stats.connect_failures += 1
+            self.stats.problem(f"connect failed: {e!r}")
+            return
+        self.stats.connected += 1
+        self.writer = writer
+        connected_at = loop.time()
+
+        try:
+            if options["protocol"] == PROTOCOL_BINARY:
+                writer.write(f"{HANDSHAKE_PREFIX} {PROTOCOL_BINARY}\n".encode("utf-8"))
+                # Anything before the acknowledgement is still JSON
+                while json.loads(await reader.readline()).get("proto") != PROTOCOL_BINARY:
+                    pass
+                read = self.read_binary(reader)
+            else:
+                read = self.read_json(reader)
+
+            tasks = [asyncio.create_task(read)]
+            if options["probe_rate" if self.probe else "rate"] > 0:
+                tasks.append(asyncio.create_task(self.send_commands(writer, stop_at)))
+            done, _ = await asyncio.wait(tasks, timeout=max(stop_at - loop.time(), 0),
+                                         return_when=asyncio.FIRST_EXCEPTION)
+            if tasks[0] in done:
+                # The read side finished before the run did: the server dropped us
+                self.stats.disconnects += 1
+            for task in tasks:
+                task.cancel()
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            self.stats.disconnects += 1
+            self.stats.problem(f"connection error: {e!r}")
+        finally:
+            writer.close()
+
+        if self.pending:
+            self.stats.probes_unconfirmed += 1
+        self.stats.client_rates.append(self.packets / max(loop.time() - connected_at, 1e-9))
+
+async def run_clients(options, indices):
+    loop = asyncio.get_running_loop()
+    stats = LoadStats()
+    start = loop.time()
+    stop_at = start + options["ramp"] + options["duration"]
+    clients = []
+    for i in indices:
+        start_at = start + options["ramp"] * i / options["clients"]
+        client = VirtualClient(stats, options, random.Random(options["seed"] + i), probe=i == 0)
+        clients.append(client.run(start_at, stop_at))
+    await asyncio.gather(*clients)
+    return stats
+
+def _run_shard(options, indices):
+    """Process pool entry point: one event loop driving a slice of the clients"""
+    return asyncio.run(run_clients(options, indices)).to_dict()
+
+def summarize(stats, options, elapsed):
+    """Per-run report: throughput, command latency percentiles and histogram, failures"""
+    latencies_ms = np.asarray(stats.latencies_us) / 1000
+    counts = np.histogram(latencies_ms, bins=(0,) + LATENCY_BUCKETS_MS + (np.inf,))[0] if len(latencies_ms) \
+        else np.zeros(len(LATENCY_BUCKETS_MS) + 1, dtype=int)
+    labels = [f"<={b:g}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]:g}ms"]
+    rates = np.asarray(stats.client_rates)
+    report = {
+        "clients": options["clients"],
+        "options": {k: v for k, v in options.items() if k != "clients"},
+        "elapsed_s": elapsed,
+        "counters": {name: getattr(stats, name) for name in LoadStats.COUNTERS},
+        "throughput": {
+            "packets_per_sec": stats.packets / options["duration"],
+            "bytes_per_sec": stats.bytes / options["duration"],
+            "commands_per_sec": stats.commands_sent / options["duration"],
+            "client_packets_per_sec_p50": float(np.median(rates)) if len(rates) else 0.0,
+            "client_packets_per_sec_min": float(rates.min()) if len(rates) else 0.0
+        },
+        "command_latency_ms": {},
+        "latency_histogram": dict(zip(labels, counts.tolist())),
+        "problems": stats.problems
+    }
+    if len(latencies_ms):
+        p50, p90, p99 = np.percentile(latencies_ms, (50, 90, 99))
+        report["command_latency_ms"] = {"p50": float(p50), "p90": float(p90), "p99": float(p99),
+                                        "max": float(latencies_ms.max()), "samples": len(latencies_ms)}
+    return report
+
+def run_load(clients, host='127.0.0.1', port=65500, duration=10.0, ramp=1.0, rate=1.0,
+             protocol=PROTOCOL_JSON, partial=False, processes=1, connect_timeout=5.0, seed=0, probe_rate=10.0):
+    """Drive `clients` concurrent connections for `duration` seconds (after a `ramp`-second ramp-up)
+
+    Client 0 is the latency probe (see VirtualClient); the others only generate load.
+    """
+    options = {"clients": clients, "host": host, "port": port, "duration": duration, "ramp": ramp,
+               "rate": rate, "probe_rate": probe_rate, "protocol": protocol, "partial": partial, "processes": processes,
+               "connect_timeout": connect_timeout, "seed": seed}
+    start = time.perf_counter()
+    if processes > 1:
+        shards = [list(range(p, clients, processes)) for p in range(processes)]
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+            stats = LoadStats.merge(pool.map(_run_shard, [options] * processes, shards))
+    else:
+        stats = asyncio.run(run_clients(options, range(clients)))
+    return summarize(stats, options, time.perf_counter() - start)
+
+def print_report(report):
+    c, t = report["counters"], report["throughput"]
+    lat = report["command_latency_ms"]
+    print(f"\n   👥 {report['clients']} clients ({c['connected']} connected, {c['connect_failures']} failed, "
+          f"{c['disconnects']} dropped)")
+    print(f"   📥 {t['packets_per_sec']:,.0f} packets/s | {t['bytes_per_sec'] / 1e6:.2f} MB/s | "
+          f"per client p50 {t['client_packets_per_sec_p50']:.1f}/s, min {t['client_packets_per_sec_min']:.1f}/s")
+    print(f"   ✅ {c['packets']:,} valid | {c['invalid']} invalid | {c['torn']} torn")
+    print(f"   🎮 {c['commands_sent']:,} commands | probes: {c['probes_sent']:,} sent, {c['probes_confirmed']:,} confirmed, "
+          f"{c['probes_lost']} lost, {c['probes_unconfirmed']} unconfirmed")
+    if lat:
+        print(f"   ⏱️ Command -> update: p50 {lat['p50']:.2f} ms | p90 {lat['p90']:.2f} ms | "
+              f"p99 {lat['p99']:.2f} ms | max {lat['max']:.2f} ms")
+        total = max(sum(report["latency_histogram"].values()), 1)
+        for label, count in report["latency_histogram"].items():
+            if count:
+                print(f"      {label:>10} {'█' * max(1, round(40 * count / total))} {count}")
+    for problem in report["problems"]:
+        print(f"   ⚠️ {problem}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate many concurrent Unity clients against server.py")
+    parser.add_argument('--host', default='127.0.0.1', help="Server address")
+    parser.add_argument('--port', type=int, default=65500, help="Server port")
+    parser.add_argument('--clients', default='100',
+                        help="Concurrent clients; a comma-separated list (e.g. 50,100,200) runs one stage per count")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds to measure each stage")
+    parser.add_argument('--ramp', type=float, default=1.0, help="Seconds over which clients connect")
+    parser.add_argument('--rate', type=float, default=1.0, help="Commands per second per client (0 = listen only)")
+    parser.add_argument('--probe-rate', type=float, default=10.0,
+                        help="Latency probes per second, sent by client 0 only (0 = no latency measurement)")
+    parser.add_argument('--protocol', choices=(PROTOCOL_JSON, PROTOCOL_BINARY), default=PROTOCOL_JSON)
+    parser.add_argument('--delta', action='store_true', help="Accept partial packets (server runs with --delta)")
+    parser.add_argument('--processes', type=int, default=1, help="Client processes, for loads one core can't drive")
+    parser.add_argument('--output-dir', default=LOADGEN_OUTPUT_DIR, help="Where to write the report JSON")
+    args = parser.parse_args()
+
+    print("="*60)
+    print(f"🌊 LOAD TEST against {args.host}:{args.port} ({args.protocol}, {args.rate:g} cmd/s per client)")
+    print("="*60)
+    stages = []
+    for clients in [int(n) for n in args.clients.split(',')]:
+        report = run_load(clients, args.host, args.port, args.duration, args.ramp, args.rate,
+                          args.protocol, args.delta, args.processes, probe_rate=args.probe_rate)
+        print_report(report)
+        stages.append(report)
+
+    if len(stages) > 1:
+        print(f"\n   {'Clients':>8}{'packets/s':>12}{'per client':>12}{'p50 ms':>10}{'p99 ms':>10}{'failures':>10}")
+        for s in stages:
+            lat = s["command_latency_ms"]
+            failures = s["counters"]["connect_failures"] + s["counters"]["disconnects"]
+            print(f"   {s['clients']:>8}{s['throughput']['packets_per_sec']:>12,.0f}"
+                  f"{s['throughput']['client_packets_per_sec_p50']:>12.1f}{lat.get('p50', float('nan')):>10.2f}"
+                  f"{lat.get('p99', float('nan')):>10.2f}{failures:>10}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"loadgen_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"timestamp": time.strftime('%Y-%m-%d %H:%M:%S'), "stages": stages}, f, indent=2)
+    print(f"\n   💾 Report saved to {path}")
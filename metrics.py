@@ -0,0 +1,255 @@
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds (seconds): 10 µs to 10 s
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in sorted(labels.items())) + '}'
+
+class Counter:
+    """Monotonic count; inc() is a single attribute update, cheap enough for every packet
+
+    The name always ends in _total, and HELP/TYPE use the same name as the sample,
+    as the 0.0.4 text format requires for the counter type to be recognised.
+    """
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=None):
+        self.name = name if name.endswith('_total') else name + '_total'
+        self.help = help_text
+        self.labels = labels or {}
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        yield self.name, self.labels, self.value
+
+class Gauge:
+    """Current value, read from a callback at scrape time so the hot path pays nothing"""
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, read, labels=None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.read = read
+
+    def samples(self):
+        yield self.name, self.labels, self.read()
+
+class Histogram:
+    """Fixed-bucket latency histogram fed with monotonic-timer durations (seconds)
+
+    observe() is a bisect plus two additions. Writers are not locked; each histogram
+    is fed from one thread, and a scrape that races an update is at most one sample off.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, labels=None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot: above the largest bound
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def time(self):
+        """Context manager for code that isn't already taking timestamps"""
+        return _Timer(self)
+
+    def percentile(self, q):
+        """Upper bucket bound containing the q-th percentile (None if empty)"""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield self.name + '_bucket', dict(self.labels, le=f'{bound:g}'), cumulative
+        yield self.name + '_bucket', dict(self.labels, le='+Inf'), self.count
+        yield self.name + '_sum', self.labels, self.sum
+        yield self.name + '_count', self.labels, self.count
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+class Registry:
+    """All metrics of one process, rendered in the Prometheus text exposition format"""
+    def __init__(self):
+        self.metrics = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=None):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, read, labels=None):
+        return self._add(Gauge(name, help_text, read, labels))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, labels=None):
+        return self._add(Histogram(name, help_text, buckets, labels))
+
+    def render(self):
+        lines = []
+        described = set()
+        for metric in self.metrics:
+            if metric.name not in described:
+                described.add(metric.name)
+                lines.append(f'# HELP {metric.name} {metric.help}')
+                lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_labels(labels)} {value:g}' if isinstance(value, float)
+                             else f'{name}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+# Process-wide default registry, shared by every instrumented module
+REGISTRY = Registry()
+
+class SamplingProfiler:
+    """Statistical profiler: a background thread samples every other thread's stack
+
+    Costs nothing while stopped, so it can stay attached to a running server and be
+    switched on when needed. Results are collapsed stacks ("thread;outer;...;inner count"),
+    the input format of flamegraph.pl and speedscope.
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = StackCounter()
+        self.samples = 0
+        self.thread = None
+        self.stopping = threading.Event()
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        if self.running:
+            return False
+        self.stacks.clear()
+        self.samples = 0
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """Stop sampling; returns the collapsed stacks"""
+        if self.running:
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+        return self.collapsed()
+
+    def toggle(self):
+        if self.running:
+            self.stop()
+            return False
+        return self.start()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self.stopping.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def top(self, limit=10):
+        """Leaf frames with the most samples: [(frame, samples)]"""
+        leaves = StackCounter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
+
+class MetricsServer:
+    """Local HTTP endpoint: GET /metrics (Prometheus), /profile/start and /profile/stop"""
+    def __init__(self, registry=REGISTRY, profiler=None, host='127.0.0.1', port=9100):
+        self.registry = registry
+        self.profiler = profiler or SamplingProfiler()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    server._reply(self, 200, server.registry.render(), 'text/plain; version=0.0.4')
+                elif self.path == '/profile/start':
+                    started = server.profiler.start()
+                    server._reply(self, 200 if started else 409,
+                                  'profiler started\n' if started else 'profiler already running\n')
+                elif self.path == '/profile/stop':
+                    server._reply(self, 200, server.profiler.stop())
+                else:
+                    server._reply(self, 404, 'try /metrics, /profile/start or /profile/stop\n')
+
+            def log_message(self, *args):
+                pass  # Keep scrapes out of the live console
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @staticmethod
+    def _reply(handler, status, body, content_type='text/plain'):
+        data = body.encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='metrics', daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
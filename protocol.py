@@ -0,0 +1,152 @@
+import json
+import struct
+import time
+
+# Wire protocols a client can pick with the connect-time handshake
+PROTOCOL_JSON = 'json'
+PROTOCOL_BINARY = 'binary'
+PROTOCOL_VERSION = 2
+
+# Handshake: the client sends "proto binary\n"; the server answers with one JSON
+# line {"proto": "binary", "version": 2} and every byte after it is binary frames.
+HANDSHAKE_PREFIX = 'proto'
+
+# Frame header: payload length (bytes after the header), message type
+FRAME_HEADER = struct.Struct('<IB')
+MSG_STATUS = 1
+MSG_STRING = 2
+
+# Status body: mode, radiation, toxic_gas, co2, oxygen, prediction_water, prediction_food,
+# prediction_oxygen, alert id, action id
+# float32 matches the float fields Unity's ServerData already uses
+STATUS_BODY = struct.Struct('<c7fHH')
+# String definition body: id, followed by the UTF-8 text
+STRING_BODY = struct.Struct('<H')
+
+def handshake_reply(protocol):
+    """JSON line the server sends to acknowledge a protocol switch"""
+    return (json.dumps({"proto": protocol, "version": PROTOCOL_VERSION}) + "\n").encode('utf-8')
+
+class StringTable:
+    """Append-only table interning alert/action text to 16-bit ids"""
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, text):
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.ids[text] = string_id
+            self.strings.append(text)
+        return string_id
+
+    def definitions(self, start=0):
+        """String definition frames for every entry from `start` onwards"""
+        frames = []
+        for string_id in range(start, len(self.strings)):
+            body = STRING_BODY.pack(string_id) + self.strings[string_id].encode('utf-8')
+            frames.append(FRAME_HEADER.pack(len(body), MSG_STRING) + body)
+        return b''.join(frames)
+
+def encode_status(status_report, table):
+    """Pack a status report into one binary frame, interning its text into `table`"""
+    sensor = status_report["sensor"]
+    body = STATUS_BODY.pack(
+        status_report["mode"].encode('ascii'),
+        sensor["radiation"],
+        sensor["toxic_gas"],
+        sensor["co2"],
+        sensor["oxygen"],
+        status_report["prediction_water"],
+        status_report["prediction_food"],
+        status_report["prediction_oxygen"],
+        table.intern(status_report["alert_message"]),
+        table.intern(status_report["action_plan"])
+    )
+    return FRAME_HEADER.pack(len(body), MSG_STATUS) + body
+
+class BinaryDecoder:
+    """Incremental decoder: feed raw bytes, get back complete status reports"""
+    def __init__(self):
+        self.buffer = bytearray()
+        self.strings = {}
+
+    def feed(self, data):
+        self.buffer.extend(data)
+        reports = []
+        offset = 0
+        while len(self.buffer) - offset >= FRAME_HEADER.size:
+            length, msg_type = FRAME_HEADER.unpack_from(self.buffer, offset)
+            start = offset + FRAME_HEADER.size
+            if len(self.buffer) - start < length:
+                break  # Partial frame, wait for more bytes
+            body = bytes(self.buffer[start:start + length])
+            offset = start + length
+
+            if msg_type == MSG_STRING:
+                (string_id,) = STRING_BODY.unpack_from(body)
+                self.strings[string_id] = body[STRING_BODY.size:].decode('utf-8')
+            elif msg_type == MSG_STATUS:
+                reports.append(self._decode_status(body))
+            else:
+                raise ValueError(f"Unknown message type {msg_type}")
+        del self.buffer[:offset]
+        return reports
+
+    def _decode_status(self, body):
+        (mode, radiation, toxic_gas, co2, oxygen,
+         water, food, oxygen_use, alert_id, action_id) = STATUS_BODY.unpack(body)
+        return {
+            "mode": mode.decode('ascii'),
+            "sensor": {"radiation": radiation, "toxic_gas": toxic_gas, "co2": co2, "oxygen": oxygen},
+            "alert_message": self.strings.get(alert_id, ""),
+            "action_plan": self.strings.get(action_id, ""),
+            "prediction_water": water,
+            "prediction_food": food,
+            "prediction_oxygen": oxygen_use
+        }
+
+def benchmark(iterations=100000):
+    """Compare bytes per packet and encode/decode cost of JSON lines vs binary frames"""
+    status_report = {
+        "mode": "r",
+        "sensor": {"radiation": 500, "toxic_gas": 0, "co2": 400, "oxygen": 21},
+        "alert_message": "WARNING: HIGH RADIATION",
+        "action_plan": "ACT: activate_shield",
+        "prediction_water": 761.9,
+        "prediction_food": 304560.2,
+        "prediction_oxygen": 83752.4
+    }
+
+    def timed(fn):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        return (time.perf_counter() - start) / iterations * 1e6
+
+    json_packet = (json.dumps(status_report) + "\n").encode('utf-8')
+    json_encode = timed(lambda: (json.dumps(status_report) + "\n").encode('utf-8'))
+    json_decode = timed(lambda: json.loads(json_packet.decode('utf-8')))
+
+    table = StringTable()
+    binary_packet = encode_status(status_report, table)  # Steady state: strings already interned
+    binary_encode = timed(lambda: encode_status(status_report, table))
+    decoder = BinaryDecoder()
+    decoder.feed(table.definitions())
+    assert decoder.feed(binary_packet)[0]["action_plan"] == status_report["action_plan"]
+    binary_decode = timed(lambda: decoder.feed(binary_packet))
+
+    print("="*60)
+    print("📦 WIRE PROTOCOL BENCHMARK")
+    print("="*60)
+    print(f"   {'Protocol':<10}{'Bytes/packet':>14}{'Encode µs':>12}{'Decode µs':>12}")
+    print(f"   {'JSON':<10}{len(json_packet):>14}{json_encode:>12.2f}{json_decode:>12.2f}")
+    print(f"   {'Binary':<10}{len(binary_packet):>14}{binary_encode:>12.2f}{binary_decode:>12.2f}")
+    print(f"   Size reduction: {len(json_packet) / len(binary_packet):.1f}x")
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,79 +1,157 @@
+from types import MappingProxyType
+from detect import ALERT_RADIATION, ALERT_TOXIC_GAS, ALERT_CO2, ALERT_LOW_OXYGEN
+
+# Declarative rule table, in tie-break order (earlier rules win at equal priority).
+# alert_bit links a rule to the detect.py alert it handles (0 = raised manually only).
+EMERGENCY_RULES = (
+    {
+        "emergency": "radiation_high",
+        "alert_bit": ALERT_RADIATION,
+        "alert_message": "WARNING: HIGH RADIATION",
+        "action_plan": "ACT: activate_shield",
+        "action": "activate_shield",
+        "sub_decisions": {
+            "shield_active": "monitor_levels",
+            "shield_failed": "evacuate_to_inner_chamber"
+        },
+        "resources": {"energy": 50, "manpower": 2}
+    },
+    {
+        "emergency": "toxic_gas",
+        "alert_bit": ALERT_TOXIC_GAS,
+        "alert_message": "WARNING: TOXIC GAS",
+        "action_plan": "ACT: SEAL VENTS",
+        "action": "seal_ventilation",
+        "sub_decisions": {
+            "seal_successful": "activate_filters",
+            "seal_failed": "deploy_emergency_masks"
+        },
+        "resources": {"filters": 3, "energy": 20}
+    },
+    {
+        "emergency": "low_oxygen",
+        "alert_bit": ALERT_LOW_OXYGEN,
+        "alert_message": "WARNING: LOW OXYGEN",
+        "action_plan": "ACT: ELECTROLYSIS ON",
+        "action": "activate_electrolysis",
+        "sub_decisions": {
+            "electrolysis_online": "monitor_levels",
+            "electrolysis_failed": "release_oxygen_reserves"
+        },
+        "resources": {"energy": 40, "water": 10}
+    },
+    {
+        "emergency": "co2_high",
+        "alert_bit": ALERT_CO2,
+        "alert_message": "WARNING: HIGH CO2",
+        "action_plan": "ACT: CARBON FILTER ON",
+        "action": "activate_carbon_filter",
+        "sub_decisions": {
+            "filter_active": "monitor_levels",
+            "filter_saturated": "replace_filter_cartridges"
+        },
+        "resources": {"filters": 2, "energy": 10}
+    },
+    {
+        "emergency": "structural_damage",
+        "alert_bit": 0,
+        "alert_message": "WARNING: STRUCTURAL DAMAGE",
+        "action_plan": "ACT: assess_damage",
+        "action": "assess_damage",
+        "sub_decisions": {
+            "minor": "repair_immediately",
+            "major": "evacuate_section"
+        },
+        "resources": {"materials": 100, "manpower": 5}
+    },
+    {
+        "emergency": "power_failure",
+        "alert_bit": 0,
+        "alert_message": "WARNING: POWER FAILURE",
+        "action_plan": "ACT: switch_to_backup",
+        "action": "switch_to_backup",
+        "sub_decisions": {
+            "backup_online": "diagnose_main",
+            "backup_failed": "activate_manual_generators"
+        },
+        "resources": {"backup_fuel": 200, "manpower": 3}
+    }
+)
+
+# severity -> (priority, resource multiplier); lower priority number = more urgent
+SEVERITY_LEVELS = {"low": (3, 0.5), "medium": (2, 1.0), "high": (1, 2.0)}
+# Server emergency level -> severity
+SEVERITY_BY_LEVEL = {1: "low", 2: "medium", 3: "high"}
+
+def _freeze(response):
+    """Read-only snapshot of a response dict"""
+    frozen = dict(response)
+    frozen["sub_actions"] = tuple(response["sub_actions"])
+    frozen["resources_needed"] = MappingProxyType(dict(response["resources_needed"]))
+    return MappingProxyType(frozen)
+
 class EmergencyDecisionTree:
-    def __init__(self):
+    def __init__(self, rules=EMERGENCY_RULES):
+        self.rules = {rule["emergency"]: rule for rule in rules}
+        self.rank = {name: i for i, name in enumerate(self.rules)}
         self.decision_tree = {
-            "radiation_high": {
-                "action": "activate_shield",
-                "sub_decisions": {
-                    "shield_active": "monitor_levels",
-                    "shield_failed": "evacuate_to_inner_chamber"
-                }
-            },
-            "toxic_gas": {
-                "action": "seal_ventilation",
-                "sub_decisions": {
-                    "seal_successful": "activate_filters",
-                    "seal_failed": "deploy_emergency_masks"
-                }
-            },
-            "structural_damage": {
-                "action": "assess_damage",
-                "sub_decisions": {
-                    "minor": "repair_immediately",
-                    "major": "evacuate_section"
-                }
-            },
-            "power_failure": {
-                "action": "switch_to_backup",
-                "sub_decisions": {
-                    "backup_online": "diagnose_main",
-                    "backup_failed": "activate_manual_generators"
-                }
-            }
+            name: {"action": rule["action"], "sub_decisions": rule["sub_decisions"]}
+            for name, rule in self.rules.items()
         }
-    
-    def make_decision(self, emergency_type, severity="high", additional_data=None):
-        """Make decisions based on emergency situations"""
-        if emergency_type not in self.decision_tree:
-            return self.default_response()
+        self.alert_rules = [(rule["alert_bit"], name) for name, rule in self.rules.items() if rule["alert_bit"]]
         
-        decision = self.decision_tree[emergency_type]
-        
-        response = {
+        # Every (emergency_type, severity) response is compiled once up front
+        self.responses = {
+            (name, severity): _freeze(self._compile(name, severity))
+            for name in self.rules
+            for severity in SEVERITY_LEVELS
+        }
+        self.default = _freeze(self.default_response())
+    
+    def _compile(self, emergency_type, severity):
+        rule = self.rules[emergency_type]
+        return {
             "emergency": emergency_type,
             "severity": severity,
-            "immediate_action": decision["action"],
-            "sub_actions": [],
+            "immediate_action": rule["action"],
+            # Sub-actions are only dispatched at high severity
+            "sub_actions": list(rule["sub_decisions"].values()) if severity == "high" else [],
             "priority": self.calculate_priority(severity),
-            "timestamp": "2024-01-15 14:30:00"  # Should use datetime.now() in production
+            "timestamp": "2024-01-15 14:30:00",  # Should use datetime.now() in production
+            "resources_needed": self.estimate_resources(emergency_type, severity),
+            "alert_message": rule["alert_message"],
+            "action_plan": rule["action_plan"]
         }
-        
-        # Add sub-actions based on severity
-        if severity == "high":
-            for sub_action in decision["sub_decisions"].values():
-                response["sub_actions"].append(sub_action)
-        
-        # Add resource requirements
-        response["resources_needed"] = self.estimate_resources(emergency_type, severity)
-        
-        return response
+    
+    def make_decision(self, emergency_type, severity="high", additional_data=None):
+        """Make decisions based on emergency situations (returns a read-only snapshot)"""
+        response = self.responses.get((emergency_type, severity))
+        if response is not None:
+            return response
+        if emergency_type not in self.rules:
+            return self.default
+        # Unlisted severity: compile on demand, same fallbacks as calculate_priority/estimate_resources
+        return _freeze(self._compile(emergency_type, severity))
+    
+    def decide_batch(self, emergencies):
+        """Evaluate many (emergency_type, severity) pairs at once, most urgent first"""
+        responses = [self.make_decision(emergency_type, severity) for emergency_type, severity in emergencies]
+        return sorted(responses, key=lambda r: (r["priority"], self.rank.get(r["emergency"], len(self.rank))))
+    
+    def decide_alerts(self, alert_mask, severity="high"):
+        """Responses for every rule whose detect.py alert bit is set in `alert_mask`, most urgent first"""
+        return self.decide_batch((name, severity) for bit, name in self.alert_rules if alert_mask & bit)
     
     def calculate_priority(self, severity):
-        priorities = {"low": 3, "medium": 2, "high": 1}
-        return priorities.get(severity, 3)
+        return SEVERITY_LEVELS.get(severity, (3, 1.0))[0]
     
     def estimate_resources(self, emergency_type, severity):
         """Estimate resources required to handle emergency situations"""
-        resource_map = {
-            "radiation_high": {"energy": 50, "manpower": 2},
-            "toxic_gas": {"filters": 3, "energy": 20},
-            "structural_damage": {"materials": 100, "manpower": 5},
-            "power_failure": {"backup_fuel": 200, "manpower": 3}
-        }
-        
-        base = resource_map.get(emergency_type, {})
+        rule = self.rules.get(emergency_type)
+        base = rule["resources"] if rule else {}
         
         # Adjust based on severity level
-        multiplier = {"low": 0.5, "medium": 1.0, "high": 2.0}.get(severity, 1.0)
+        multiplier = SEVERITY_LEVELS.get(severity, (3, 1.0))[1]
         
         return {k: v * multiplier for k, v in base.items()}
     
@@ -84,4 +162,4 @@ class EmergencyDecisionTree:
             "sub_actions": ["seal_all_doors", "activate_backup_systems"],
             "priority": 1,
             "resources_needed": {"energy": 100, "manpower": 5}
-        }
\ No newline at end of file
+        }
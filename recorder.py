@@ -0,0 +1,278 @@
+import argparse
+import mmap
+import os
+import struct
+import threading
+import time
+
+# Session log layout: one header slot, then fixed-width 64-byte record slots.
+# Alert/action text is interned: a STRING record (spanning as many slots as its
+# text needs) defines an id once, and status records carry only the 16-bit ids.
+MAGIC = b'SHELTLOG'
+LOG_VERSION = 1
+RECORD_SIZE = 64
+# magic, version, record size, wall-clock start time, online-learning forgetting factor (0 = off)
+HEADER = struct.Struct('<8sHHdd')
+
+REC_STATUS = 1
+REC_COMMAND = 2
+REC_OBSERVATION = 3
+REC_STRING = 4
+
+# kind, mode, emergency level, alert id, action id, ns since start, snapshot seq,
+# online updates applied, sensor (radiation, toxic_gas, co2, oxygen), 3 float64 values
+# (status: predicted water/food/oxygen; observation: measured consumption)
+RECORD = struct.Struct('<BcBxHHqII4f3d')
+# kind, string id, text length, ns since start; the UTF-8 text follows in the same and next slots
+STRING_HEADER = struct.Struct('<BxHHxxq')
+SENSOR_FIELDS = ('radiation', 'toxic_gas', 'co2', 'oxygen')
+PREDICTION_FIELDS = ('prediction_water', 'prediction_food', 'prediction_oxygen')
+
+class SessionRecorder:
+    """Append-only, memory-mapped log of commands, observations and status snapshots
+
+    Each append is one struct.pack_into into the mapping (no syscall); the file grows
+    by doubling and is truncated to its used length on close. Safe to call from the
+    loop and compute threads at once.
+    """
+    def __init__(self, path, forgetting=0.0, initial_records=16384):
+        self.path = path
+        self.file = open(path, 'w+b')
+        self.size = RECORD_SIZE * (1 + initial_records)
+        self.file.truncate(self.size)
+        self.map = mmap.mmap(self.file.fileno(), self.size)
+        self.map[:HEADER.size] = HEADER.pack(MAGIC, LOG_VERSION, RECORD_SIZE, time.time(), forgetting)
+        self.offset = RECORD_SIZE
+        self.start = time.perf_counter_ns()
+        self.strings = {}
+        self.lock = threading.Lock()
+        self.records = 0
+        self.statuses = 0
+        # CPU time spent inside append calls; thread time, so waiting on a GIL held by
+        # the other server threads isn't billed to the recorder
+        self.overhead_ns = 0
+
+    def _reserve(self, length):
+        """Offset for `length` bytes, remapping at double the size when the file is full"""
+        if self.offset + length > self.size:
+            self.map.close()
+            self.size *= 2
+            self.file.truncate(self.size)
+            self.map = mmap.mmap(self.file.fileno(), self.size)
+        offset = self.offset
+        self.offset += length
+        self.records += 1
+        return offset
+
+    def _intern(self, text, now):
+        string_id = self.strings.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings[text] = string_id
+            data = text.encode('utf-8')
+            slots = -(-(STRING_HEADER.size + len(data)) // RECORD_SIZE)
+            offset = self._reserve(slots * RECORD_SIZE)
+            STRING_HEADER.pack_into(self.map, offset, REC_STRING, string_id, len(data), now)
+            start = offset + STRING_HEADER.size
+            self.map[start:start + len(data)] = data
+        return string_id
+
+    def command(self, command):
+        with self.lock:
+            started = time.thread_time_ns()
+            offset = self._reserve(RECORD_SIZE)  # Before reading self.map: reserving may remap it
+            RECORD.pack_into(self.map, offset, REC_COMMAND, command[:1].encode('ascii'), 0,
+                             0, 0, time.perf_counter_ns() - self.start, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+            self.overhead_ns += time.thread_time_ns() - started
+
+    def observation(self, level, values, online_updates):
+        with self.lock:
+            started = time.thread_time_ns()
+            offset = self._reserve(RECORD_SIZE)
+            RECORD.pack_into(self.map, offset, REC_OBSERVATION, b'-', level,
+                             0, 0, time.perf_counter_ns() - self.start, 0, online_updates, 0, 0, 0, 0, *values)
+            self.overhead_ns += time.thread_time_ns() - started
+
+    def status(self, report, level, seq=0, online_updates=0):
+        with self.lock:
+            started = time.thread_time_ns()
+            now = time.perf_counter_ns() - self.start
+            alert_id = self._intern(report["alert_message"], now)
+            action_id = self._intern(report["action_plan"], now)
+            sensor = report["sensor"]
+            offset = self._reserve(RECORD_SIZE)
+            RECORD.pack_into(self.map, offset, REC_STATUS, report["mode"].encode('ascii'), level,
+                             alert_id, action_id, now, seq, online_updates,
+                             *[sensor[field] for field in SENSOR_FIELDS],
+                             *[report[field] for field in PREDICTION_FIELDS])
+            self.statuses += 1
+            self.overhead_ns += time.thread_time_ns() - started
+
+    def overhead_us(self):
+        """Mean recording cost per status snapshot (µs), commands and observations included"""
+        return self.overhead_ns / max(self.statuses, 1) / 1000
+
+    def close(self):
+        with self.lock:
+            self.map.flush()
+            self.map.close()
+            self.file.truncate(self.offset)
+            self.file.close()
+
+class SessionLog:
+    """Reader for a session log; iterating yields (kind, seconds since start, fields dict) in order"""
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        magic, version, record_size, self.started, self.forgetting = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != LOG_VERSION or record_size != RECORD_SIZE:
+            raise ValueError(f"{path} is not a version {LOG_VERSION} session log")
+        self.strings = {}
+
+    def __iter__(self):
+        offset = RECORD_SIZE
+        while offset + RECORD_SIZE <= len(self.data):
+            kind = self.data[offset]
+            if kind == 0:
+                return  # Zero-filled tail of a log that was not closed cleanly
+            if kind == REC_STRING:
+                _, string_id, length, _ = STRING_HEADER.unpack_from(self.data, offset)
+                start = offset + STRING_HEADER.size
+                self.strings[string_id] = self.data[start:start + length].decode('utf-8')
+                offset += -(-(STRING_HEADER.size + length) // RECORD_SIZE) * RECORD_SIZE
+                continue
+
+            (_, mode, level, alert_id, action_id, t_ns, seq, online_updates,
+             *values) = RECORD.unpack_from(self.data, offset)
+            offset += RECORD_SIZE
+            seconds = t_ns / 1e9
+            if kind == REC_COMMAND:
+                yield 'command', seconds, {"command": mode.decode('ascii')}
+            elif kind == REC_OBSERVATION:
+                yield 'observation', seconds, {"level": level, "values": values[4:], "online_updates": online_updates}
+            elif kind == REC_STATUS:
+                report = {
+                    "mode": mode.decode('ascii'),
+                    "sensor": dict(zip(SENSOR_FIELDS, values[:4])),
+                    "alert_message": self.strings.get(alert_id, ""),
+                    "action_plan": self.strings.get(action_id, ""),
+                    **dict(zip(PREDICTION_FIELDS, values[4:]))
+                }
+                yield 'status', seconds, {"report": report, "level": level, "seq": seq,
+                                          "online_updates": online_updates}
+            else:
+                raise ValueError(f"Unknown record kind {kind} at offset {offset - RECORD_SIZE}")
+
+def compare_status(recorded, replayed, level, replayed_level, tolerance):
+    """Differences between a recorded and a replayed status report ([] if they match)"""
+    differences = []
+    if level != replayed_level:
+        differences.append(f"level {level} -> {replayed_level}")
+    for field in ("mode", "alert_message", "action_plan"):
+        if recorded[field] != replayed[field]:
+            differences.append(f"{field} {recorded[field]!r} -> {replayed[field]!r}")
+    for field in PREDICTION_FIELDS:
+        if abs(recorded[field] - replayed[field]) > tolerance:
+            differences.append(f"{field} {recorded[field]:.1f} -> {replayed[field]:.1f}")
+    return differences
+
+def replay(path, speed=None, tolerance=0.05, verbose=True):
+    """Feed a recorded session back through the server's compute stage and diff every snapshot
+
+    speed: 1 = real time, 100 = 100x faster, None = unthrottled. Observations are applied
+    exactly where they were in the live session (matched by online update count), so the
+    replay is deterministic. Returns a summary with the mismatches found.
+    """
+    import server  # Deferred: server.py imports this module for --record
+
+    log = SessionLog(path)
+    server.predictor.load_or_train(num_people=server.SHELTER_POPULATION, verbose=False)
+    if log.forgetting:
+        server.predictor.enable_online(log.forgetting)
+
+    pending_observations = []
+    statuses = commands = 0
+    mismatches = []
+    compute_seconds = 0.0
+    start = time.perf_counter()
+    for kind, seconds, fields in log:
+        if speed:
+            delay = seconds / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+
+        if kind == 'command':
+            commands += 1
+        elif kind == 'observation':
+            pending_observations.append(fields)
+        elif kind == 'status':
+            # Catch the model up to the state the live snapshot was computed with
+            while pending_observations and pending_observations[0]["online_updates"] <= fields["online_updates"]:
+                obs = pending_observations.pop(0)
+                server.predictor.observe(server.SHELTER_DAY, server.SHELTER_POPULATION, obs["level"], 1.0,
+                                         list(obs["values"]))
+            tick = time.perf_counter()
+            report, level = server.build_status_report(fields["report"]["mode"])
+            compute_seconds += time.perf_counter() - tick
+            statuses += 1
+            differences = compare_status(fields["report"], report, fields["level"], level, tolerance)
+            if differences:
+                mismatches.append({"seq": fields["seq"], "time": seconds, "differences": differences})
+
+    elapsed = time.perf_counter() - start
+    result = {"statuses": statuses, "commands": commands, "mismatches": len(mismatches),
+              "first_mismatches": mismatches[:10], "elapsed_s": elapsed,
+              "statuses_per_sec": statuses / elapsed if elapsed else 0.0,
+              "compute_us_per_status": compute_seconds / max(statuses, 1) * 1e6}
+    if verbose:
+        print(f"   ▶️ Replayed {statuses} snapshots and {commands} commands in {elapsed:.2f} s "
+              f"({result['statuses_per_sec']:,.0f} snapshots/s, {result['compute_us_per_status']:.1f} µs compute each)")
+        if mismatches:
+            print(f"   ❌ {len(mismatches)} snapshots differ from the recording:")
+            for mismatch in mismatches[:10]:
+                print(f"      #{mismatch['seq']} at {mismatch['time']:.3f} s: {'; '.join(mismatch['differences'])}")
+        else:
+            print("   ✅ Every snapshot matches the recording")
+    return result
+
+def info(path):
+    log = SessionLog(path)
+    counts = {}
+    last = 0.0
+    for kind, seconds, _ in log:
+        counts[kind] = counts.get(kind, 0) + 1
+        last = seconds
+    print(f"   📼 {path}: {os.path.getsize(path):,} bytes, {last:.1f} s recorded "
+          f"(started {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(log.started))})")
+    print(f"   {counts.get('status', 0)} snapshots | {counts.get('command', 0)} commands | "
+          f"{counts.get('observation', 0)} observations | {len(log.strings)} strings")
+
+def benchmark(path, records=100000):
+    """Recording cost per snapshot with realistic reports"""
+    report = {"mode": "r", "sensor": {"radiation": 500, "toxic_gas": 0, "co2": 400, "oxygen": 21},
+              "alert_message": "WARNING: HIGH RADIATION", "action_plan": "ACT: activate_shield",
+              "prediction_water": 761.9, "prediction_food": 304560.2, "prediction_oxygen": 83752.4}
+    recorder = SessionRecorder(path)
+    for seq in range(records):
+        recorder.status(report, 3, seq)
+    recorder.close()
+    print(f"   📼 {records:,} snapshots: {recorder.overhead_us():.2f} µs each, "
+          f"{os.path.getsize(path) / records:.0f} bytes each")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect, replay or benchmark recorded server sessions")
+    parser.add_argument('action', choices=('replay', 'info', 'bench'))
+    parser.add_argument('log', help="Session log written by server.py --record")
+    parser.add_argument('--speed', type=float, default=0,
+                        help="Replay speed: 1 = real time, 100 = 100x, 0 = unthrottled")
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help="Allowed absolute difference in replayed predictions")
+    args = parser.parse_args()
+
+    if args.action == 'info':
+        info(args.log)
+    elif args.action == 'bench':
+        benchmark(args.log)
+    else:
+        result = replay(args.log, args.speed or None, args.tolerance)
+        raise SystemExit(1 if result["mismatches"] else 0)
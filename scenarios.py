@@ -0,0 +1,155 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from predict import ResourcePredictor, RESOURCE_UNITS
+
+# Same emergency level mix generate_training_data draws from
+DEFAULT_LEVEL_PROBS = (0.7, 0.2, 0.1)
+ACTIVITY_RANGE = (0.5, 1.5)
+
+def level_transition_matrix(persistence=0.8, stationary=DEFAULT_LEVEL_PROBS):
+    """Markov chain over levels 1-3: keep the level with probability `persistence`, otherwise redraw from `stationary`
+
+    `stationary` is the chain's long-run distribution, so long horizons settle on the training mix.
+    """
+    stationary = np.asarray(stationary, dtype=float)
+    return persistence * np.eye(len(stationary)) + (1 - persistence) * stationary[None, :]
+
+def sample_trajectories(rng, samples, future_days, emergency_level, activity_level, transition, activity_sigma):
+    """Emergency level and activity paths of shape (samples, future_days), starting from the current state"""
+    future_days = max(int(future_days), 0)
+    levels = np.empty((samples, future_days), dtype=np.int8)
+    if future_days == 0:
+        return levels, np.empty((samples, 0))
+    levels[:, 0] = emergency_level
+    # Normalized rows with an exact 1.0 at the end, so rounding can never draw a level past 3
+    transition = np.asarray(transition, dtype=float)
+    cumulative = np.cumsum(transition / transition.sum(axis=1, keepdims=True), axis=1)
+    cumulative[:, -1] = 1.0
+    for day in range(1, future_days):
+        u = rng.random(samples)
+        levels[:, day] = (u[:, None] > cumulative[levels[:, day - 1] - 1]).sum(axis=1) + 1
+
+    # Random walk around the current activity level, kept inside the trained range
+    steps = rng.normal(0.0, activity_sigma, size=(samples, future_days))
+    steps[:, 0] = 0.0
+    activity = np.clip(activity_level + np.cumsum(steps, axis=1), *ACTIVITY_RANGE)
+    return levels, activity
+
+def _simulate_chunk(evaluator, current_day, num_people, emergency_level, activity_level, future_days,
+                    samples, transition, activity_sigma, seed):
+    """Sample one chunk of trajectories and evaluate them in one pass -> (samples, future_days, targets)"""
+    rng = np.random.default_rng(seed)
+    levels, activity = sample_trajectories(rng, samples, future_days, emergency_level, activity_level,
+                                           transition, activity_sigma)
+    features = np.empty((samples, levels.shape[1], 4))
+    features[:, :, 0] = current_day + np.arange(levels.shape[1])
+    features[:, :, 1] = num_people
+    features[:, :, 2] = levels
+    features[:, :, 3] = activity
+    num_targets = evaluator.coef.shape[1] if evaluator.coef.ndim > 1 else 1
+    predictions = evaluator.evaluate(features.reshape(-1, 4)).reshape(samples, levels.shape[1], num_targets)
+    return np.maximum(predictions, 0).astype(np.float32)  # Ensure non-negative
+
+_SCENARIO_POOL = None
+
+def _scenario_pool():
+    """Process pool for large sample counts, created on first use and reused afterwards"""
+    global _SCENARIO_POOL
+    if _SCENARIO_POOL is None:
+        _SCENARIO_POOL = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                             mp_context=multiprocessing.get_context('spawn'))
+    return _SCENARIO_POOL
+
+class MonteCarloForecaster:
+    """Resource forecasts over sampled emergency-level / activity trajectories instead of a fixed scenario
+
+    Samples are drawn in fixed-size chunks with seeds spawned from one SeedSequence,
+    so a given seed gives the same result whether the chunks run inline or in the pool.
+    """
+    def __init__(self, predictor, transition=None, activity_sigma=0.05, chunk_size=10000,
+                 parallel_threshold=50000):
+        self.predictor = predictor
+        self.transition = level_transition_matrix() if transition is None else np.asarray(transition, dtype=float)
+        self.activity_sigma = activity_sigma
+        self.chunk_size = chunk_size
+        self.parallel_threshold = parallel_threshold
+
+    def simulate(self, current_day, num_people, emergency_level=1, activity_level=1.0, future_days=30,
+                 samples=5000, seed=0):
+        """Daily consumption for every sampled trajectory: array of shape (samples, future_days, targets)"""
+        if self.predictor.evaluator is None:
+            raise RuntimeError("Model is not trained; call load_or_train() first")
+
+        sizes = [min(self.chunk_size, samples - start) for start in range(0, samples, self.chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        args = (self.predictor.evaluator, current_day, num_people, emergency_level, activity_level, future_days)
+        jobs = [args + (size, self.transition, self.activity_sigma, chunk_seed)
+                for size, chunk_seed in zip(sizes, seeds)]
+
+        if samples >= self.parallel_threshold and len(jobs) > 1 and (os.cpu_count() or 1) > 1:
+            chunks = list(_scenario_pool().map(_simulate_chunk, *zip(*jobs)))
+        else:
+            chunks = [_simulate_chunk(*job) for job in jobs]
+        return np.concatenate(chunks)
+
+    def forecast(self, current_day, num_people, emergency_level=1, activity_level=1.0, future_days=30,
+                 samples=5000, stock=None, seed=0, percentiles=(5, 50, 95)):
+        """Percentile bands of daily and cumulative consumption, plus days until `stock` runs out
+
+        stock: optional {target: amount on hand}. Depletion days beyond the horizon are reported as None.
+        """
+        daily = self.simulate(current_day, num_people, emergency_level, activity_level, future_days, samples, seed)
+        cumulative = np.cumsum(daily, axis=1, dtype=np.float64)
+        daily_bands = np.percentile(daily, percentiles, axis=0)  # (P, days, targets)
+        cumulative_bands = np.percentile(cumulative, percentiles, axis=0)
+        labels = [f"p{p:g}" for p in percentiles]
+
+        result = {"samples": samples, "future_days": future_days, "daily": {}, "cumulative": {}, "depletion": {}}
+        for k, target in enumerate(self.predictor.targets):
+            result["daily"][target] = {label: daily_bands[i, :, k].tolist() for i, label in enumerate(labels)}
+            result["cumulative"][target] = {label: cumulative_bands[i, :, k].tolist() for i, label in enumerate(labels)}
+
+            if stock and target in stock:
+                depleted = cumulative[:, :, k] >= stock[target]
+                # First day the stock is exhausted (1-based); future_days + 1 = lasts the whole horizon
+                if future_days > 0:
+                    days_left = np.where(depleted.any(axis=1), depleted.argmax(axis=1) + 1, future_days + 1)
+                else:
+                    days_left = np.full(samples, future_days + 1)  # Empty horizon: nothing runs out within it
+                bands = np.percentile(days_left, percentiles, method='nearest')
+                depletion = {label: (int(v) if v <= future_days else None) for label, v in zip(labels, bands)}
+                depletion["probability"] = float(depleted[:, -1].mean()) if future_days > 0 else 0.0
+                result["depletion"][target] = depletion
+        return result
+
+def demo():
+    predictor = ResourcePredictor()
+    predictor.load_or_train(num_people=50, metrics_only=True)
+    forecaster = MonteCarloForecaster(predictor)
+    stock = {"water": 12000, "food": 9000000, "oxygen": 2500000}
+
+    print("="*60)
+    print("🎲 MONTE CARLO FORECAST (50 people, day 100, level 1, 30 days)")
+    print("="*60)
+    result = forecaster.forecast(100, 50, emergency_level=1, future_days=30, samples=5000, stock=stock)
+    for target in predictor.targets:
+        bands = result["daily"][target]
+        unit = RESOURCE_UNITS.get(target, '')
+        print(f"   {target:<7} day 30 P5/P50/P95: {bands['p5'][-1]:>10.1f} {bands['p50'][-1]:>10.1f} "
+              f"{bands['p95'][-1]:>10.1f} {unit}")
+        depletion = result["depletion"][target]
+        print(f"   {'':<7} stock {stock[target]:,} runs out in P5/P50/P95 days: "
+              f"{depletion['p5']} / {depletion['p50']} / {depletion['p95']} "
+              f"(P(within 30 days) = {depletion['probability']:.1%})")
+
+    print(f"\n   {'Samples':>10}{'Seconds':>10}")
+    for samples in (5000, 50000, 200000):
+        start = time.perf_counter()
+        forecaster.simulate(100, 50, samples=samples)
+        print(f"   {samples:>10}{time.perf_counter() - start:>10.3f}")
+
+if __name__ == "__main__":
+    demo()
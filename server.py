@@ -1,52 +1,102 @@
-import socket
+import argparse
+import asyncio
 import json
-import time
+import os
 import threading  # Key import: multi-threading
+import time
+from collections import deque
+from types import MappingProxyType
 from detect import AirQualityMonitor
-from react import EmergencyDecisionTree
-from predict import ResourcePredictor
-
-# --- Global variables (for inter-thread communication) ---
-current_command = 'n'  # Default: Normal
-running = True
+from react import EmergencyDecisionTree, SEVERITY_BY_LEVEL
+from predict import ResourcePredictor, ForecastCache, RESOURCE_TARGETS, RESOURCE_UNITS
+from protocol import (PROTOCOL_JSON, PROTOCOL_BINARY, HANDSHAKE_PREFIX,
+                      StringTable, encode_status, handshake_reply)
+from metrics import REGISTRY, MetricsServer, SamplingProfiler
+from recorder import SessionRecorder
 
 # Initialize modules
 monitor = AirQualityMonitor()
 decision_system = EmergencyDecisionTree()
 predictor = ResourcePredictor()
+# The live loop asks for the same few scenarios every tick: serve them from a precomputed table
+forecaster = ForecastCache(predictor)
 
-# Pre-train the model (training a linear regression model to predict future water consumption)
-print("\n" + "="*50)
-print("🚀 UNDERGROUND SHELTER AI SYSTEM")
-print("="*50)
-X_train, y_water, y_food, y_oxygen = predictor.generate_training_data(num_people=50)
-try:
-    score = predictor.train_model(X_train, y_water)
-    print(f"\n   🎯 Model Training Score (R²): {score:.4f}")
-    if score >= 0.9:
-        print("   ✓ Excellent model fit!")
-    elif score >= 0.7:
-        print("   ✓ Good model fit")
-    else:
-        print("   ⚠️ Warning: Low model fit, predictions may be unstable")
-except Exception as e:
-    print(f"   ❌ Model training failed: {e}")
-    print("   Predictions will not work properly!")
-print("\n" + "="*50)
-print("✅ AI MODEL READY FOR DEPLOYMENT")
-print("="*50)
+# Seconds a client may stall a write before it is disconnected
+SEND_TIMEOUT = 5.0
+# Highest supported status push rate (Hz)
+MAX_TICK_RATE = 120.0
+
+MODE_NAMES = {'n': 'Normal', 'r': 'Radiation', 'g': 'Gas', 'o': 'Oxygen'}
+
+# The single live shelter the stream reports on
+SHELTER_DAY = 100
+SHELTER_POPULATION = 50
+
+# --- Hot-path instrumentation, exposed with --metrics-port ---
+STAGES = ('update', 'decision', 'prediction', 'tick', 'serialization', 'send')
+STAGE_SECONDS = {stage: REGISTRY.histogram('shelter_stage_seconds', "Time spent in each stage of a tick",
+                                           labels={'stage': stage}) for stage in STAGES}
+COMMANDS_RECEIVED = {source: REGISTRY.counter('shelter_commands_received', "Mode commands (n/r/g/o) received",
+                                              labels={'source': source}) for source in ('unity', 'keyboard')}
+# Everything else a client sends: handshakes, observations, unknown lines
+MESSAGES_RECEIVED = {kind: REGISTRY.counter('shelter_client_messages', "Non-command lines received from clients",
+                                            labels={'kind': kind}) for kind in ('handshake', 'observation', 'invalid')}
+PACKETS_SENT = REGISTRY.counter('shelter_packets_sent', "Packets written to clients")
+BYTES_SENT = REGISTRY.counter('shelter_bytes_sent', "Bytes written to clients")
+SEND_FAILURES = REGISTRY.counter('shelter_send_failures', "Clients dropped because a send failed or timed out")
+ERRORS = {stage: REGISTRY.counter('shelter_errors', "Errors handled without stopping the server",
+                                  labels={'stage': stage}) for stage in ('prediction', 'observation')}
+# Sampling profiler, toggled with 'p' or GET /profile/start|stop on the metrics port
+profiler = SamplingProfiler()
+PROFILE_OUTPUT_DIR = os.path.join(os.path.dirname(__file__), 'benchmark_output')
+
+def prepare_model(force_retrain=False, metrics_only=False, forgetting=0.99, sweep=False, inference_only=False):
+    """Startup: load the saved model artifact, or train (and save) a fresh one if it is stale
+
+    Nothing is loaded or trained at import time; call this once before start_server().
+    The training report is rendered in a background worker, so the server can start
+    accepting clients as soon as the model itself is fitted. Afterwards the model keeps
+    learning from 'obs' lines, discounting older samples by `forgetting`. With sweep,
+    the degree/penalty grid is searched first and the best model is served (and saved).
+    inference_only serves the saved model as-is, without importing sklearn or matplotlib.
+    """
+    print("\n" + "="*50)
+    print("🚀 UNDERGROUND SHELTER AI SYSTEM")
+    print("="*50)
+    try:
+        if inference_only:
+            score = predictor.load_for_inference(num_people=SHELTER_POPULATION)
+            print(f"\n   💾 Inference-only: serving {predictor.artifact_path}")
+        elif sweep:
+            predictor.sweep(num_people=SHELTER_POPULATION, metrics_only=metrics_only)
+            score = predictor.training_history['metrics']['r2_score']
+        else:
+            score = predictor.load_or_train(num_people=SHELTER_POPULATION, force_retrain=force_retrain,
+                                            metrics_only=metrics_only, background_report=True)
+        predictor.enable_online(forgetting)
+        print(f"\n   🎯 Model Training Score (R²): {score:.4f}")
+        if score >= 0.9:
+            print("   ✓ Excellent model fit!")
+        elif score >= 0.7:
+            print("   ✓ Good model fit")
+        else:
+            print("   ⚠️ Warning: Low model fit, predictions may be unstable")
+    except Exception as e:
+        print(f"   ❌ Model {'loading' if inference_only else 'training'} failed: {e}")
+        print("   Predictions will not work properly!")
+    print("\n" + "="*50)
+    print("✅ AI MODEL READY FOR DEPLOYMENT")
+    print("="*50)
 
 # --- Keyboard listener thread function ---
-def input_listener():
-    """Background thread to handle keyboard input without blocking main loop"""
-    global current_command, running
-    print("   [Keyboard Listener Started] Type n, r, g, o, or q and press Enter...")
-    while running:
+def input_listener(submit_command):
+    """Background thread to handle keyboard input without blocking the event loop"""
+    print("   [Keyboard Listener Started] Type n, r, g, o, s (stats), p (profiler), or q and press Enter...")
+    while True:
         try:
-            # This input() blocks, but only blocks the sub-thread, not the main thread!
+            # This input() blocks, but only blocks the sub-thread, not the event loop!
             cmd = input().strip().lower()
-            if cmd in ['n', 'r', 'g', 'o', 'q']:
-                current_command = cmd
+            if cmd in ['n', 'r', 'g', 'o', 's', 'p', 'q']:
                 if cmd == 'n':
                     print(">>> ✅ Command received: Normal Mode")
                 elif cmd == 'r':
@@ -55,150 +105,618 @@ def input_listener():
                     print(">>> ☠️ Command received: Toxic Gas Leak!")
                 elif cmd == 'o':
                     print(">>> 💨 Command received: Oxygen Shortage!")
+                elif cmd == 's':
+                    print(">>> 📊 Pipeline stats:")
+                elif cmd == 'p':
+                    print(">>> 🔬 Toggling profiler...")
                 elif cmd == 'q':
                     print(">>> Shutting down...")
-                    running = False
+                submit_command(cmd)
+                if cmd == 'q':
+                    break
             else:
-                print("   [Invalid Command] Use: n, r, g, o, or q")
+                print("   [Invalid Command] Use: n, r, g, o, s, p, or q")
         except EOFError:
             break
 
-def unity_command_listener(conn):
-    """Background thread to receive commands from Unity"""
-    global current_command, running
-    conn.setblocking(False)  # Non-blocking mode
-    buffer = ""
-    
-    while running:
-        try:
-            data = conn.recv(1024)
-            if data:
-                buffer += data.decode('utf-8')
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    cmd = line.strip().lower()
-                    if cmd in ['n', 'r', 'g', 'o']:
-                        current_command = cmd
-                        mode_names = {'n': 'Normal', 'r': 'Radiation', 'g': 'Gas', 'o': 'Oxygen'}
-                        print(f"\n>>> 🎮 Unity Command: {mode_names.get(cmd, cmd)}")
-        except BlockingIOError:
-            pass  # No data available, continue
-        except Exception as e:
-            break
-        time.sleep(0.1)
-
-def start_server():
-    global current_command, running
-    
-    host = '127.0.0.1'
-    port = 65500  # Keep the same as your Unity settings
-    
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    
-    try:
-        server_socket.bind((host, port))
-        server_socket.listen(1)
-        print(f"\n🎧 Waiting for Unity connection...")
-        conn, addr = server_socket.accept()
-        print(f"✅ Unity connected from {addr}! Entering [Director Mode]")
-        
-        # --- Start background thread for keyboard input ---
-        t = threading.Thread(target=input_listener)
-        t.daemon = True  # Daemon thread: exits when main program exits
-        t.start()
-        
-        # --- Start background thread for Unity commands ---
-        t_unity = threading.Thread(target=unity_command_listener, args=(conn,))
-        t_unity.daemon = True
-        t_unity.start()
-        
-        print("------------------------------------------------")
-        print("🎬 LIVE DATA STREAM ACTIVE (auto-refresh every second)")
-        print("   Terminal: [n] Normal | [r] Radiation | [g] Gas | [o] Oxygen | [q] Quit")
-        print("   Unity buttons also work!")
-        print("------------------------------------------------")
-
-        # State variables
+def build_status_report(command):
+    """Turn the current command into the status packet sent to Unity (steps A-D)"""
+    start = time.perf_counter()
+    # --- A. Update state based on the current command ---
+    if command == 'r':
+        current_data = {"radiation": 500, "toxic_gas": 0, "co2": 400, "oxygen": 21}
+        current_emergency_level = 3  # Critical!
+    elif command == 'g':
+        current_data = {"radiation": 10, "toxic_gas": 200, "co2": 400, "oxygen": 21}
+        current_emergency_level = 2  # Warning
+    elif command == 'o':
+        current_data = {"radiation": 10, "toxic_gas": 0, "co2": 400, "oxygen": 15}
+        current_emergency_level = 2  # Warning
+    else:
         current_data = {"radiation": 10, "toxic_gas": 0, "co2": 400, "oxygen": 21}
-        current_emergency_level = 1
-
-        while running:
-            # --- A. Update state based on global command (set by keyboard thread) ---
-            if current_command == 'n':
-                current_data = {"radiation": 10, "toxic_gas": 0, "co2": 400, "oxygen": 21}
-                current_emergency_level = 1  # Normal
-            elif current_command == 'r':
-                current_data = {"radiation": 500, "toxic_gas": 0, "co2": 400, "oxygen": 21}
-                current_emergency_level = 3  # Critical!
-            elif current_command == 'g':
-                current_data = {"radiation": 10, "toxic_gas": 200, "co2": 400, "oxygen": 21}
-                current_emergency_level = 2  # Warning
-            elif current_command == 'o':
-                current_data = {"radiation": 10, "toxic_gas": 0, "co2": 400, "oxygen": 15}
-                current_emergency_level = 2  # Warning
-            elif current_command == 'q':
-                break
-
-            # --- B. Prepare data packet ---
-            status_report = {
-                "mode": current_command,  # Send current mode to Unity!
-                "sensor": current_data,
-                "alert_message": "SYSTEM NORMAL",
-                "action_plan": "MONITORING",
-                "prediction_water": 0.0
-            }
+        current_emergency_level = 1  # Normal
+
+    # --- B. Prepare data packet ---
+    status_report = {
+        "mode": command,  # Send current mode to Unity!
+        "sensor": current_data,
+        "alert_message": "SYSTEM NORMAL",
+        "action_plan": "MONITORING",
+        "prediction_water": 0.0,
+        "prediction_food": 0.0,
+        "prediction_oxygen": 0.0
+    }
+
+    updated = time.perf_counter()
+    STAGE_SECONDS['update'].observe(updated - start)
+
+    # --- C. Execute React decision logic (every alert through the one rule engine) ---
+    alert_mask = monitor.record(current_data)
+    decisions = decision_system.decide_alerts(alert_mask, SEVERITY_BY_LEVEL[current_emergency_level])
+    if decisions:
+        status_report["alert_message"] = decisions[0]["alert_message"]
+        status_report["action_plan"] = decisions[0]["action_plan"]
+
+    decided = time.perf_counter()
+    STAGE_SECONDS['decision'].observe(decided - updated)
+
+    # --- D. Execute AI Prediction (water, food and oxygen from one evaluation) ---
+    try:
+        future = forecaster.predict_resources(
+            current_day=SHELTER_DAY,
+            num_people=SHELTER_POPULATION,
+            emergency_level=current_emergency_level,
+            future_days=1
+        )
+        for resource in RESOURCE_TARGETS:
+            status_report[f"prediction_{resource}"] = round(future[resource][0], 1)
+    except Exception as e:
+        ERRORS['prediction'].inc()
+        print(f"   [AI Error] Prediction failed: {e}")
+        for resource in RESOURCE_TARGETS:
+            status_report[f"prediction_{resource}"] = -1.0
+    predicted = time.perf_counter()
+    STAGE_SECONDS['prediction'].observe(predicted - decided)
+    STAGE_SECONDS['tick'].observe(predicted - start)
+
+    return status_report, current_emergency_level
+
+def freeze(status_report):
+    """Read-only view of a status report (nested sensor dict included)"""
+    return MappingProxyType({k: MappingProxyType(v) if isinstance(v, dict) else v
+                             for k, v in status_report.items()})
+
+def encode_json(report):
+    """One JSON line; default=dict unwraps the read-only mappings"""
+    return (json.dumps(report, default=dict) + "\n").encode('utf-8')
+
+class LatestValue:
+    """Thread-safe single-slot queue: put() overwrites an unconsumed value (counted as coalesced)"""
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.value = None
+        self.full = False
+        self.closed = False
+        self.puts = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return int(self.full)
+
+    def put(self, value):
+        with self.cond:
+            if self.full:
+                self.coalesced += 1
+            self.value = value
+            self.full = True
+            self.puts += 1
+            self.cond.notify()
+
+    def get(self):
+        """Block for the next value; None once closed"""
+        with self.cond:
+            while not self.full and not self.closed:
+                self.cond.wait()
+            if not self.full:
+                return None
+            self.full = False
+            return self.value
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+class StatusSnapshot:
+    """Immutable result of one compute pass; wire encodings are built once, on first use (loop thread only)"""
+    def __init__(self, seq, command, level, status_report, online_updates=0):
+        self.seq = seq
+        self.command = command
+        self.level = level
+        self.online_updates = online_updates  # Streaming updates folded into the model that produced it
+        self.report = freeze(status_report)
+        self._json = None
+        self._frame = None
+        self._deltas = {}
+
+    def json(self):
+        if self._json is None:
+            self._json = encode_json(self.report)
+        return self._json
+
+    def frame(self, table):
+        if self._frame is None:
+            self._frame = encode_status(self.report, table)
+        return self._frame
+
+    def delta_from(self, base):
+        """JSON line with only the top-level fields that differ from `base`; None if nothing changed"""
+        if base.seq not in self._deltas:
+            changed = {k: v for k, v in self.report.items() if base.report.get(k) != v}
+            self._deltas[base.seq] = encode_json(changed) if changed else None
+        return self._deltas[base.seq]
+
+class UnityClient:
+    """One connected viewer, fed through a latest-value slot drained by its own writer task
+
+    A slow client never queues a backlog: while it is still draining, newer snapshots
+    replace the pending one, and it is sent whatever is latest once it catches up.
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.addr = writer.get_extra_info('peername')
+        self.wake = asyncio.Event()
+        self.pending = None  # Latest snapshot not yet sent
+        self.control = deque()  # One-off messages (handshake replies), sent before the next snapshot
+        self.last_sent = None  # Snapshot the client last received; deltas are taken against it
+        self.last_keyframe = 0.0
+        self.protocol = PROTOCOL_JSON  # JSON lines unless the client asks for binary
+        self.strings_sent = 0  # Binary only: how many string table entries this client has
+        self.coalesced = 0
+        self.packets_sent = 0
+        self.bytes_sent = 0
+
+    def depth(self):
+        return len(self.control) + (self.pending is not None)
+
+    def offer(self, snapshot):
+        """Hand over a new snapshot without ever blocking the producer"""
+        if self.pending is not None:
+            self.coalesced += 1
+        self.pending = snapshot
+        self.wake.set()
+
+    def push_control(self, packet):
+        self.control.append(packet)
+        self.wake.set()
 
-            # --- C. Execute React decision logic ---
-            if current_data["radiation"] > 100:
-                decision = decision_system.make_decision("radiation_high", "high")
-                status_report["alert_message"] = "WARNING: HIGH RADIATION"
-                status_report["action_plan"] = f"ACT: {decision['immediate_action']}"
-            elif current_data["toxic_gas"] > 50:
-                status_report["alert_message"] = "WARNING: TOXIC GAS"
-                status_report["action_plan"] = "ACT: SEAL VENTS"
-            elif current_data["oxygen"] < 19.5:
-                status_report["alert_message"] = "WARNING: LOW OXYGEN"
-                status_report["action_plan"] = "ACT: ELECTROLYSIS ON"
-
-            # --- D. Execute AI Prediction (KEY FIX!) ---
+    def write(self, packet):
+        self.writer.write(packet)
+        self.packets_sent += 1
+        self.bytes_sent += len(packet)
+        PACKETS_SENT.inc()
+        BYTES_SENT.inc(len(packet))
+
+    async def send_loop(self, encode):
+        """`encode(client, snapshot)` returns the bytes to send for a snapshot, or None to skip it"""
+        while True:
+            await self.wake.wait()
+            self.wake.clear()
+            while self.control:
+                self.write(self.control.popleft())
+            if self.pending is not None:
+                snapshot, self.pending = self.pending, None
+                start = time.perf_counter()
+                packet = encode(self, snapshot)
+                STAGE_SECONDS['serialization'].observe(time.perf_counter() - start)
+                self.last_sent = snapshot
+                if packet:
+                    self.write(packet)
+            # A client that stops reading is disconnected instead of stalling the others
+            start = time.perf_counter()
+            await asyncio.wait_for(self.writer.drain(), SEND_TIMEOUT)
+            STAGE_SECONDS['send'].observe(time.perf_counter() - start)
+
+    async def receive_loop(self, on_command):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return  # Client closed the connection
+            on_command(line.decode('utf-8', errors='ignore'))
+
+    def close(self):
+        self.writer.close()
+
+class ShelterServer:
+    """Asyncio TCP server, pipelined into a compute stage and per-client I/O stages
+
+    Compute (sensing, decisions, predictions) runs on its own thread and publishes
+    immutable StatusSnapshots; the event loop only handles commands, encoding and
+    sockets. Stages are joined by latest-value slots, so a slow model or a stalled
+    client coalesces updates instead of blocking anything upstream.
+    """
+    def __init__(self, host='127.0.0.1', port=65500, keyboard=False,
+                 tick_rate=1.0, delta=False, keyframe_interval=5.0, metrics_port=None, record=None):
+        if not 0 < tick_rate <= MAX_TICK_RATE:
+            raise ValueError(f"tick_rate must be in (0, {MAX_TICK_RATE:g}] Hz, got {tick_rate}")
+        self.host = host
+        self.port = port
+        self.keyboard = keyboard
+        self.tick_rate = tick_rate
+        # Delta mode: send only changed top-level fields, plus a full keyframe every keyframe_interval seconds
+        self.delta = delta
+        self.keyframe_interval = keyframe_interval
+        self.metrics_port = metrics_port  # Local Prometheus endpoint; None = off
+        self.metrics_server = None
+        self.record_path = record  # Session log path; None = don't record
+        self.recorder = None
+        self.snapshot = None  # Latest published snapshot, replayed to late joiners
+        self.strings = StringTable()
+        self.clients = set()
+        self.handlers = set()  # Connection handler tasks, awaited on shutdown
+        self.current_command = 'n'  # Default: Normal
+        self.current_level = 1
+        self.commands = None  # asyncio.Queue, created inside the running loop
+        self.stopped = None
+        self.loop = None
+
+        # Compute stage
+        self.requests = LatestValue()  # Pending compute request (the command to evaluate)
+        self.compute_thread = None
+        self.seq = 0
+        self.compute_seconds = 0.0
+        self.snapshots_published = 0
+        self.last_print = 0.0
+        self.printed_report = None
+
+    def submit_command(self, cmd):
+        """Queue a command; must be called from the event loop thread"""
+        self.commands.put_nowait(cmd)
+
+    def submit_command_threadsafe(self, cmd):
+        """Queue a command from another thread (e.g. the keyboard listener)"""
+        if cmd in MODE_NAMES:
+            COMMANDS_RECEIVED['keyboard'].inc()
+        self.loop.call_soon_threadsafe(self.submit_command, cmd)
+
+    def handle_unity_command(self, client, line):
+        cmd = line.strip().lower()
+        if cmd.startswith(HANDSHAKE_PREFIX):
+            MESSAGES_RECEIVED['handshake'].inc()
+            self.handle_handshake(client, cmd[len(HANDSHAKE_PREFIX):].strip())
+        elif cmd.startswith('obs'):
+            MESSAGES_RECEIVED['observation'].inc()
+            self.handle_observation(client, cmd[3:])
+        elif cmd in ['n', 'r', 'g', 'o']:
+            COMMANDS_RECEIVED['unity'].inc()
+            print(f"\n>>> 🎮 Unity Command: {MODE_NAMES.get(cmd, cmd)}")
+            self.submit_command(cmd)
+        else:
+            MESSAGES_RECEIVED['invalid'].inc()
+
+    def handle_observation(self, client, args):
+        """'obs <water> <food> <oxygen>': measured consumption under the current scenario
+
+        The streaming update is O(p²), so it runs inline on the loop and the next
+        packet already carries the corrected forecast.
+        """
+        try:
+            values = [float(v) for v in args.split()]
+        except ValueError:
+            values = []
+        if len(values) != len(predictor.targets):
+            ERRORS['observation'].inc()
+            print(f"\n   [Invalid Observation] {client.addr}: expected {len(predictor.targets)} values "
+                  f"({', '.join(predictor.targets)})")
+            return
+        try:
+            error = predictor.observe(SHELTER_DAY, SHELTER_POPULATION, self.current_level, 1.0, values)
+            if self.recorder:
+                self.recorder.observation(self.current_level, values, predictor.online.samples)
+        except RuntimeError as e:
+            ERRORS['observation'].inc()
+            print(f"\n   [AI Error] Online update failed: {e}")
+            return
+        print(f"\n   📈 Learned from {client.addr}: water error {error[predictor.targets[0]]:+.1f} "
+              f"{RESOURCE_UNITS.get(predictor.targets[0], '')} (update #{predictor.online.samples})")
+        self.request_update()
+
+    def handle_handshake(self, client, protocol):
+        """Switch a client's wire protocol; JSON lines stay the default"""
+        if protocol not in (PROTOCOL_JSON, PROTOCOL_BINARY):
+            print(f"\n   [Invalid Handshake] {client.addr} asked for protocol '{protocol}'")
+            return
+        client.push_control(handshake_reply(protocol))
+        client.protocol = protocol
+        client.strings_sent = 0
+        client.last_sent = None  # Resync with a full packet in the new format
+        print(f"\n   🤝 {client.addr} switched to {protocol} protocol")
+        if self.snapshot is not None:
+            client.offer(self.snapshot)
+
+    async def handle_client(self, reader, writer):
+        client = UnityClient(reader, writer)
+        self.clients.add(client)
+        self.handlers.add(asyncio.current_task())
+        if self.snapshot is not None:
+            client.offer(self.snapshot)  # Late joiner: start from a full snapshot
+        print(f"\n✅ Unity connected from {client.addr}! ({len(self.clients)} client(s) online)")
+
+        tasks = [
+            asyncio.create_task(client.send_loop(self.encode_for)),
+            asyncio.create_task(client.receive_loop(lambda line: self.handle_unity_command(client, line)))
+        ]
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            send = tasks[0]
+            if send in done and not send.cancelled() and send.exception() is not None:
+                SEND_FAILURES.inc()
+                if isinstance(send.exception(), asyncio.TimeoutError):
+                    print(f"\n   ⚠️ Client {client.addr} stopped reading, dropping it")
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.clients.discard(client)
+            self.handlers.discard(asyncio.current_task())
+            client.close()
+            print(f"\n   Unity disconnected: {client.addr} ({len(self.clients)} client(s) online)")
+
+    def encode_for(self, client, snapshot):
+        """Bytes to send `client` for `snapshot` (I/O stage, loop thread)"""
+        if client.protocol == PROTOCOL_BINARY:
+            # Binary frames are fixed-size snapshots, so they never need delta encoding;
+            # prefix any string definitions the client lacks
+            frame = snapshot.frame(self.strings)
+            definitions = self.strings.definitions(client.strings_sent)
+            client.strings_sent = len(self.strings)
+            return definitions + frame
+
+        now = self.loop.time()
+        if not self.delta or client.last_sent is None or now - client.last_keyframe >= self.keyframe_interval:
+            client.last_keyframe = now
+            return snapshot.json()
+        # Delta against what this client last received, so skipped snapshots are never lost
+        return snapshot.delta_from(client.last_sent)
+
+    def request_update(self):
+        """Ask the compute stage for a fresh snapshot; coalesces if it is still busy"""
+        self.requests.put(self.current_command)
+
+    def compute_loop(self):
+        """Compute stage (own thread): steps A-D for each request, then hand the snapshot to the loop"""
+        while True:
+            command = self.requests.get()
+            if command is None:
+                return
+            start = time.perf_counter()
+            status_report, level = build_status_report(command)
+            # Count carried by the evaluator this report was predicted with, not the live one
+            online_updates = getattr(forecaster.served, 'online_updates', 0)
+            self.seq += 1
+            snapshot = StatusSnapshot(self.seq, command, level, status_report, online_updates)
+            self.compute_seconds += time.perf_counter() - start
+            if self.recorder:
+                self.recorder.status(status_report, level, self.seq, snapshot.online_updates)
             try:
-                # current_emergency_level is now dynamic!
-                future = predictor.predict(
-                    current_day=100,
-                    num_people=50,
-                    emergency_level=current_emergency_level,
-                    future_days=1
-                )
-                pred_val = round(future[0], 1)
-                status_report["prediction_water"] = pred_val
-                
-                # Live debug output - shows current state every second
-                mode_names = {'n': 'NORMAL', 'r': 'RADIATION', 'g': 'GAS', 'o': 'OXYGEN'}
-                print(f"\r   [LIVE] Mode: {mode_names.get(current_command, '?')} | Level: {current_emergency_level} | Water: {pred_val} L/day    ", end='', flush=True)
-                
-            except Exception as e:
-                print(f"   [AI Error] Prediction failed: {e}")
-                status_report["prediction_water"] = -1.0
-
-            # --- E. Send data to Unity ---
+                self.loop.call_soon_threadsafe(self.publish, snapshot)
+            except RuntimeError:
+                return  # Event loop already closed
+            self.print_live(snapshot)
+
+    def print_live(self, snapshot):
+        """Live debug line (compute thread) - on every change, otherwise at most once a second"""
+        now = time.monotonic()
+        if snapshot.report == self.printed_report and now - self.last_print < 1.0:
+            return
+        self.last_print = now
+        self.printed_report = snapshot.report
+        print(f"\r   [LIVE] Mode: {MODE_NAMES.get(snapshot.command, '?').upper()} | Level: {snapshot.level} | "
+              f"Water: {snapshot.report['prediction_water']} L/day | Clients: {len(self.clients)}    ",
+              end='', flush=True)
+
+    def publish(self, snapshot):
+        """--- E. Offer the new snapshot to every connected Unity client (loop thread) ---"""
+        self.snapshot = snapshot
+        self.current_level = snapshot.level
+        self.snapshots_published += 1
+        for client in list(self.clients):
+            client.offer(snapshot)
+
+    def pipeline_stats(self):
+        """Queue depths and coalescing counters for each stage"""
+        return {
+            "compute": {
+                "requests": self.requests.puts,
+                "coalesced": self.requests.coalesced,
+                "depth": len(self.requests),
+                "snapshots": self.seq,
+                "avg_ms": self.compute_seconds / self.seq * 1000 if self.seq else 0.0
+            },
+            "io": {
+                "published": self.snapshots_published,
+                "clients": {
+                    str(client.addr): {
+                        "depth": client.depth(),
+                        "coalesced": client.coalesced,
+                        "packets": client.packets_sent,
+                        "bytes": client.bytes_sent
+                    } for client in self.clients
+                }
+            }
+        }
+
+    def print_stats(self):
+        stats = self.pipeline_stats()
+        compute = stats["compute"]
+        print(f"\n   📊 Compute: {compute['snapshots']} snapshots | {compute['requests']} requests | "
+              f"{compute['coalesced']} coalesced | depth {compute['depth']} | {compute['avg_ms']:.2f} ms avg")
+        for addr, client in stats["io"]["clients"].items():
+            print(f"   📤 {addr}: {client['packets']} packets | {client['bytes']} bytes | "
+                  f"{client['coalesced']} coalesced | depth {client['depth']}")
+        for stage, histogram in STAGE_SECONDS.items():
+            if histogram.count:
+                print(f"   ⏱️ {stage:<14} {histogram.count:>8} | mean {histogram.sum / histogram.count * 1e6:>9.1f} µs | "
+                      f"p99 <= {histogram.percentile(99) * 1e6:g} µs")
+
+    def toggle_profiler(self):
+        if profiler.toggle():
+            print("\n   🔬 Profiler started (type p again to stop)")
+            return
+        print(f"\n   🔬 Profiler stopped after {profiler.samples} samples. Hottest frames:")
+        for frame, count in profiler.top():
+            print(f"      {count / max(profiler.samples, 1):>6.1%}  {frame}")
+        os.makedirs(PROFILE_OUTPUT_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_OUTPUT_DIR, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(profiler.collapsed())
+        print(f"   💾 Collapsed stacks saved to {path}")
+
+    def start_metrics(self):
+        """Serve REGISTRY (plus live pipeline gauges) on http://127.0.0.1:<metrics_port>/metrics"""
+        REGISTRY.gauge('shelter_clients', "Connected clients", lambda: len(self.clients))
+        REGISTRY.gauge('shelter_compute_queue_depth', "Pending compute requests", lambda: len(self.requests))
+        REGISTRY.gauge('shelter_compute_coalesced', "Compute requests merged into a later one",
+                       lambda: self.requests.coalesced)
+        REGISTRY.gauge('shelter_client_coalesced', "Snapshots skipped by slow clients",
+                       lambda: sum(client.coalesced for client in list(self.clients)))
+        REGISTRY.gauge('shelter_forecast_cache_hits', "Forecast cache grid hits", lambda: forecaster.grid_hits)
+        REGISTRY.gauge('shelter_profiler_running', "1 while the sampling profiler is on",
+                       lambda: int(profiler.running))
+        self.metrics_server = MetricsServer(REGISTRY, profiler, port=self.metrics_port).start()
+        print(f"   📈 Metrics on http://127.0.0.1:{self.metrics_port}/metrics")
+
+    async def command_loop(self):
+        """Apply commands as soon as they arrive and request an out-of-cycle update"""
+        while True:
+            cmd = await self.commands.get()
+            if cmd == 'q':
+                self.stopped.set()
+                return
+            if cmd == 's':
+                self.print_stats()
+                continue
+            if cmd == 'p':
+                self.toggle_profiler()
+                continue
+            if self.recorder:
+                self.recorder.command(cmd)
+            self.current_command = cmd
+            self.request_update()
+
+    async def tick_loop(self):
+        """Request a snapshot at tick_rate Hz, scheduling against absolute deadlines so compute time doesn't drift the rate"""
+        period = 1.0 / self.tick_rate
+        next_tick = self.loop.time()
+        while not self.stopped.is_set():
+            self.request_update()
+            next_tick += period
+            delay = next_tick - self.loop.time()
+            if delay < -period:
+                # Overran by more than a tick: skip the missed ticks instead of bursting
+                next_tick -= (delay // period) * period
+                delay = next_tick - self.loop.time()
+            # Cut short when the server is stopping
             try:
-                json_str = json.dumps(status_report)
-                conn.sendall((json_str + "\n").encode('utf-8'))
-                # Optional: uncomment to see live updates
-                # print(f"   [LIVE] Level: {current_emergency_level} | Water: {pred_val} L/day")
-            except BrokenPipeError:
-                print("   Unity disconnected!")
-                break
-            
-            # Auto-refresh rate: 1 second (no need to press Enter!)
-            time.sleep(1.0)
+                await asyncio.wait_for(self.stopped.wait(), max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
 
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.commands = asyncio.Queue()
+        self.stopped = asyncio.Event()
+
+        if self.keyboard:
+            # --- Start background thread for keyboard input ---
+            t = threading.Thread(target=input_listener, args=(self.submit_command_threadsafe,))
+            t.daemon = True  # Daemon thread: exits when main program exits
+            t.start()
+
+        if self.record_path:
+            self.recorder = SessionRecorder(self.record_path, predictor.online.forgetting if predictor.online else 0.0)
+            print(f"   📼 Recording session to {self.record_path}")
+        self.compute_thread = threading.Thread(target=self.compute_loop, name='compute', daemon=True)
+        self.compute_thread.start()
+        if self.metrics_port:
+            self.start_metrics()
+
+        server = await asyncio.start_server(self.handle_client, self.host, self.port,
+                                            reuse_address=True)
+        print(f"\n🎧 Waiting for Unity connections on {self.host}:{self.port}...")
+        commands = asyncio.create_task(self.command_loop())
+        try:
+            async with server:
+                await self.tick_loop()
+        finally:
+            commands.cancel()
+            self.requests.close()
+            for client in list(self.clients):
+                client.close()
+            # Let connection handlers see EOF and clean up before the loop shuts down
+            if self.handlers:
+                await asyncio.wait(list(self.handlers), timeout=1.0)
+            await self.loop.run_in_executor(None, self.compute_thread.join, 1.0)
+            if self.metrics_server is not None:
+                self.metrics_server.close()
+            if self.recorder is not None:
+                self.recorder.close()
+                print(f"\n   📼 Recorded {self.recorder.records} records to {self.record_path} "
+                      f"({self.recorder.overhead_us():.2f} µs recording overhead per tick)")
+
+def start_server(host='127.0.0.1', port=65500, tick_rate=1.0, delta=False, keyframe_interval=5.0,
+                 metrics_port=None, record=None):
+    server = ShelterServer(host, port, keyboard=True, tick_rate=tick_rate, delta=delta,
+                           keyframe_interval=keyframe_interval, metrics_port=metrics_port, record=record)
+
+    print("------------------------------------------------")
+    print(f"🎬 LIVE DATA STREAM ACTIVE ({tick_rate:g} Hz{', delta mode' if delta else ''})")
+    print("   Terminal: [n] Normal | [r] Radiation | [g] Gas | [o] Oxygen | [s] Stats | [p] Profiler | [q] Quit")
+    print("   Unity buttons also work! Any number of Unity clients may connect.")
+    print("------------------------------------------------")
+
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        server_socket.close()
-        print("Server closed.")
+        print("\nServer closed.")
 
 if __name__ == "__main__":
-    start_server()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Underground Shelter AI backend")
+    parser.add_argument('--retrain', action='store_true',
+                        help="Ignore the saved model artifact and retrain from scratch")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser.add_argument('--port', type=int, default=65500, help="TCP port (keep the same as your Unity settings)")
+    parser.add_argument('--tick-rate', type=float, default=1.0,
+                        help=f"Status pushes per second (up to {MAX_TICK_RATE:g} Hz)")
+    parser.add_argument('--delta', action='store_true',
+                        help="Send only changed fields, with periodic full keyframes")
+    parser.add_argument('--keyframe-interval', type=float, default=5.0,
+                        help="Seconds between full keyframes in delta mode")
+    parser.add_argument('--metrics-only', action='store_true',
+                        help="When training, write the metrics summary but skip rendering plots")
+    parser.add_argument('--sweep', action='store_true',
+                        help="Grid-search polynomial degree and ridge/lasso penalty, then serve the best model")
+    parser.add_argument('--forgetting', type=float, default=0.99,
+                        help="Online learning forgetting factor in (0, 1]; 1 never forgets old samples")
+    parser.add_argument('--metrics-port', type=int,
+                        help="Serve Prometheus metrics and profiler controls on this local HTTP port")
+    parser.add_argument('--inference-only', action='store_true',
+                        help="Serve the saved model without loading the training stack (sklearn, matplotlib)")
+    parser.add_argument('--record', metavar='PATH',
+                        help="Record commands and status snapshots to a session log (see recorder.py)")
+    args = parser.parse_args()
+    if not 0 < args.tick_rate <= MAX_TICK_RATE:
+        parser.error(f"--tick-rate must be in (0, {MAX_TICK_RATE:g}]")
+    if not 0 < args.forgetting <= 1:
+        parser.error("--forgetting must be in (0, 1]")
+    if args.inference_only and (args.retrain or args.sweep):
+        parser.error("--inference-only can't be combined with --retrain or --sweep")
+
+    prepare_model(force_retrain=args.retrain, metrics_only=args.metrics_only, forgetting=args.forgetting,
+                  sweep=args.sweep, inference_only=args.inference_only)
+    start_server(args.host, args.port, args.tick_rate, args.delta, args.keyframe_interval, args.metrics_port,
+                 args.record)
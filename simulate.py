@@ -0,0 +1,114 @@
+import os
+import time
+import numpy as np
+from detect import AirQualityMonitor, ALERT_RADIATION
+from react import EmergencyDecisionTree, SEVERITY_BY_LEVEL
+from predict import ResourcePredictor, TRAINING_OUTPUT_DIR
+
+class ShelterNetwork:
+    """Struct-of-arrays state for many shelters, advanced one vectorized tick at a time
+
+    Every per-shelter quantity is a NumPy array indexed by shelter, so a tick costs
+    a fixed number of array operations however many shelters there are.
+    """
+    def __init__(self, predictor, num_shelters, monitor=None, decision_system=None,
+                 populations=(10, 200), start_day=100, seed=0):
+        self.predictor = predictor
+        self.monitor = monitor or AirQualityMonitor()
+        self.decision_system = decision_system or EmergencyDecisionTree()
+        self.rng = np.random.default_rng(seed)
+        self.num_shelters = num_shelters
+
+        # Static per-shelter parameters, inside the population range the model was trained on
+        trained = predictor.training_history.get('data_stats', {}).get('populations')
+        if trained and (populations[0] < min(trained) or populations[1] > max(trained)):
+            raise ValueError(f"Populations {populations[0]}-{populations[1]} fall outside the trained range "
+                             f"{min(trained):g}-{max(trained):g}; train on num_people spanning it")
+        self.population = self.rng.integers(populations[0], populations[1] + 1, size=num_shelters)
+        self.activity_level = self.rng.uniform(0.5, 1.5, size=num_shelters)
+
+        # Per-tick state
+        self.day = np.full(num_shelters, start_day, dtype=np.int64)
+        self.readings = np.zeros((num_shelters, 4))
+        self.alert_mask = np.zeros(num_shelters, dtype=np.uint8)
+        self.emergency_level = np.ones(num_shelters, dtype=np.int8)
+        self.action = np.full(num_shelters, -1, dtype=np.int16)  # Index into rule_names, -1 = none
+        self.forecast = np.zeros((num_shelters, len(predictor.targets)))
+        self.ticks = 0
+
+        # Alert rules in the engine's tie-break order
+        self.rule_names = [name for _, name in self.decision_system.alert_rules]
+        self.rule_bits = np.array([bit for bit, _ in self.decision_system.alert_rules], dtype=np.uint8)
+
+    def tick(self, days=1):
+        """Advance every shelter by one step"""
+        # --- A. Sensor simulation ---
+        self.readings = self.monitor.simulate_sensor_data_batch(self.num_shelters, self.rng)
+
+        # --- B. Threshold detection ---
+        self.alert_mask = self.monitor.check_air_quality_batch(self.readings)
+        # Same mapping as the live server: radiation is critical, any other alert a warning
+        self.emergency_level = np.where(self.alert_mask & ALERT_RADIATION, 3,
+                                        np.where(self.alert_mask != 0, 2, 1)).astype(np.int8)
+
+        # --- C. Decisions: highest-ranked active rule per shelter (all alerts share a severity) ---
+        self.action.fill(-1)
+        for k in range(len(self.rule_bits) - 1, -1, -1):
+            self.action[(self.alert_mask & self.rule_bits[k]) != 0] = k
+
+        # --- D. Batched forecasts for the next day ---
+        self.forecast = self.predictor.predict_batch(
+            self.day, self.population, self.emergency_level, self.activity_level,
+            future_days=1, all_targets=True
+        )[:, 0, :]
+
+        self.day += days
+        self.ticks += 1
+
+    def run(self, ticks, days=1):
+        """Run `ticks` steps; returns ticks per second"""
+        start = time.perf_counter()
+        for _ in range(ticks):
+            self.tick(days)
+        return ticks / (time.perf_counter() - start)
+
+    def decision(self, shelter):
+        """Full (read-only) decision for one shelter, built from the rule engine on demand"""
+        k = self.action[shelter]
+        if k < 0:
+            return None
+        return self.decision_system.make_decision(self.rule_names[k], SEVERITY_BY_LEVEL[int(self.emergency_level[shelter])])
+
+    def summary(self):
+        """Network-wide counts and totals for the current tick"""
+        actions = np.bincount(self.action + 1, minlength=len(self.rule_names) + 1)
+        return {
+            "shelters": self.num_shelters,
+            "ticks": self.ticks,
+            "levels": {level: int(np.count_nonzero(self.emergency_level == level)) for level in (1, 2, 3)},
+            "actions": dict(zip(["none"] + self.rule_names, actions.tolist())),
+            "forecast_total": dict(zip(self.predictor.targets, self.forecast.sum(axis=0).tolist()))
+        }
+
+def benchmark(predictor, shelter_counts=(10, 100, 1000, 10000, 100000), ticks=50):
+    """Ticks/sec and cost per shelter-tick as the network grows"""
+    print("="*60)
+    print("🏘️ MULTI-SHELTER SIMULATION BENCHMARK")
+    print("="*60)
+    print(f"   {'Shelters':>10}{'Ticks/s':>12}{'µs/tick':>12}{'ns/shelter':>12}")
+    for count in shelter_counts:
+        network = ShelterNetwork(predictor, count)
+        network.tick()  # Warm-up
+        rate = network.run(ticks)
+        print(f"   {count:>10}{rate:>12.1f}{1e6 / rate:>12.1f}{1e9 / rate / count:>12.1f}")
+
+    summary = network.summary()
+    print(f"\n   Last tick ({summary['shelters']} shelters): levels {summary['levels']}")
+    print(f"   Actions: {summary['actions']}")
+
+if __name__ == "__main__":
+    # Own artifact, so the server's single-shelter model isn't retrained back and forth
+    predictor = ResourcePredictor(os.path.join(TRAINING_OUTPUT_DIR, 'network_model_artifact.pkl'))
+    # Train on the populations the network draws from, so forecasts interpolate instead of extrapolating
+    predictor.load_or_train(num_people=list(range(10, 201, 10)), metrics_only=True)
+    benchmark(predictor)